@@ -4,7 +4,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from config import settings
 from database import init_db
-from routes import upload_router, products_router, webhooks_router, progress_router
+from routes import upload_router, products_router, webhooks_router, progress_router, imports_router
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -27,6 +27,7 @@ app.include_router(upload_router, prefix="/api", tags=["Upload"])
 app.include_router(products_router, prefix="/api", tags=["Products"])
 app.include_router(webhooks_router, prefix="/api", tags=["Webhooks"])
 app.include_router(progress_router, prefix="/api", tags=["Progress"])
+app.include_router(imports_router, prefix="/api", tags=["Imports"])
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -0,0 +1,81 @@
+import argparse
+import csv
+import os
+import random
+import shutil
+import time
+import uuid
+
+from database import SessionLocal, init_db
+from models import Product
+from tasks.csv_processor import process_csv_file, LOAD_MODES
+
+
+def generate_csv(filename: str, num_products: int, sku_prefix: str):
+    """Write a product CSV whose SKUs all start with sku_prefix"""
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sku", "name", "description", "price", "quantity", "is_active"])
+        for idx in range(1, num_products + 1):
+            writer.writerow([
+                f"{sku_prefix}-{idx:07d}",
+                f"Bench Product {idx}",
+                f"Description for bench product {idx} - generated for load testing",
+                round(random.uniform(10.0, 1000.0), 2),
+                random.randint(0, 1000),
+                "true" if random.random() > 0.1 else "false",
+            ])
+
+
+def delete_products(sku_prefix: str):
+    """Remove the rows written by a benchmark run"""
+    db = SessionLocal()
+    try:
+        db.query(Product).filter(Product.sku.like(f"{sku_prefix}-%")).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_import(source_csv: str, load_mode: str) -> tuple[float, dict]:
+    """Run process_csv_file in-process on a copy of source_csv (the task deletes its input)"""
+    work_copy = f"{source_csv}.{uuid.uuid4().hex}.csv"
+    shutil.copyfile(source_csv, work_copy)
+
+    start_time = time.perf_counter()
+    result = process_csv_file.apply(args=(work_copy, str(uuid.uuid4())), kwargs={"load_mode": load_mode}).get()
+    duration = time.perf_counter() - start_time
+
+    if os.path.exists(work_copy):
+        os.remove(work_copy)
+    return duration, result
+
+
+def benchmark(num_products: int):
+    init_db()
+    print(f"Benchmarking import of {num_products} rows per load mode...\n")
+    print(f"{'mode':<6} {'pass':<9} {'seconds':>9} {'rows/s':>10}  result")
+
+    for load_mode in LOAD_MODES:
+        sku_prefix = f"BENCH-{load_mode.upper()}-{uuid.uuid4().hex[:6]}"
+        source_csv = f"benchmark_{load_mode}.csv"
+        generate_csv(source_csv, num_products, sku_prefix)
+
+        try:
+            # First pass inserts every row, second pass re-imports the identical file
+            for pass_name in ("insert", "reimport"):
+                duration, result = run_import(source_csv, load_mode)
+                rows_per_second = num_products / duration if duration > 0 else 0
+                summary = {k: result.get(k) for k in ("status", "created", "updated", "unchanged", "errors")}
+                print(f"{load_mode:<6} {pass_name:<9} {duration:>9.2f} {rows_per_second:>10.0f}  {summary}")
+        finally:
+            delete_products(sku_prefix)
+            if os.path.exists(source_csv):
+                os.remove(source_csv)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the ORM and COPY import paths")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per generated CSV")
+    args = parser.parse_args()
+    benchmark(args.rows)
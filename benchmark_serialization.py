@@ -0,0 +1,90 @@
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import select
+
+from database import SessionLocal
+from models import Product
+
+
+def entity_page(db, rows: int) -> list:
+    """Load a page as ORM entities, as get_products did"""
+    return db.scalars(select(Product).order_by(Product.id).limit(rows)).all()
+
+
+def row_page(db, rows: int) -> list:
+    """Load a page as plain column rows, as get_products does now"""
+    return db.execute(select(*Product.api_columns()).order_by(Product.id).limit(rows)).all()
+
+
+def serialize_entities(products: list) -> bytes:
+    """to_dict per entity, then Starlette's json.dumps"""
+    return JSONResponse(content={"products": [p.to_dict() for p in products]}).body
+
+
+def serialize_entities_encoded(products: list) -> bytes:
+    """to_dict and jsonable_encoder, as for a route returning the dict itself"""
+    content = jsonable_encoder({"products": [p.to_dict() for p in products]})
+    return JSONResponse(content=content).body
+
+
+def serialize_rows(rows: list) -> bytes:
+    """Zip rows with the field names and let orjson write the datetimes"""
+    return ORJSONResponse(content={"products": [dict(zip(Product.API_FIELDS, row)) for row in rows]}).body
+
+
+def time_per_row(func, repeat: int, rows: int) -> float:
+    """Best of repeat runs of func, in microseconds per row"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best / rows * 1e6
+
+
+def benchmark(rows: int, repeat: int):
+    db = SessionLocal()
+    try:
+        # Each load uses a fresh session, so entities are built every time
+        def load_entities():
+            db.expunge_all()
+            return entity_page(db, rows)
+
+        products = load_entities()
+        plain_rows = row_page(db, rows)
+        rows = len(plain_rows)
+        if not rows:
+            print("No products to benchmark; import some first")
+            return
+
+        # Both paths must produce the same JSON
+        assert json.loads(serialize_entities(products)) == json.loads(serialize_rows(plain_rows))
+
+        print(f"Per-row cost over a page of {rows} products (best of {repeat})\n")
+        print(f"{'step':<44} {'us/row':>8}")
+        results = [
+            ("load: ORM entities", time_per_row(load_entities, repeat, rows)),
+            ("load: column rows", time_per_row(lambda: row_page(db, rows), repeat, rows)),
+            ("serialize: to_dict + json.dumps", time_per_row(lambda: serialize_entities(products), repeat, rows)),
+            (
+                "serialize: to_dict + jsonable_encoder + dumps",
+                time_per_row(lambda: serialize_entities_encoded(products), repeat, rows)
+            ),
+            ("serialize: rows + orjson", time_per_row(lambda: serialize_rows(plain_rows), repeat, rows)),
+        ]
+        for step, cost in results:
+            print(f"{step:<44} {cost:>8.2f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ORM/to_dict and row/orjson serialization of product pages")
+    parser.add_argument("--rows", type=int, default=100, help="Products per page")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per step")
+    args = parser.parse_args()
+    benchmark(args.rows, args.repeat)
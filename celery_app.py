@@ -1,12 +1,41 @@
 from celery import Celery
+from celery.signals import celeryd_init
+from kombu import Queue
 from config import settings
 
+# Named queues, so a long import never holds up webhook deliveries
+IMPORT_QUEUE = "imports"
+IMPORT_SMALL_QUEUE = "imports.small"
+WEBHOOK_QUEUE = "webhooks"
+
+# Worker settings applied per queue (see configure_queue_worker)
+QUEUE_WORKER_SETTINGS = {
+    IMPORT_QUEUE: {
+        "concurrency": settings.IMPORT_WORKER_CONCURRENCY,
+        "prefetch_multiplier": 1,
+        "time_limit": settings.IMPORT_TIME_LIMIT,
+        "soft_time_limit": settings.IMPORT_SOFT_TIME_LIMIT,
+    },
+    IMPORT_SMALL_QUEUE: {
+        "concurrency": settings.IMPORT_SMALL_WORKER_CONCURRENCY,
+        "prefetch_multiplier": 1,
+        "time_limit": settings.IMPORT_SMALL_TIME_LIMIT,
+        "soft_time_limit": settings.IMPORT_SMALL_SOFT_TIME_LIMIT,
+    },
+    WEBHOOK_QUEUE: {
+        "concurrency": settings.WEBHOOK_WORKER_CONCURRENCY,
+        "prefetch_multiplier": 4,
+        "time_limit": settings.WEBHOOK_TIME_LIMIT,
+        "soft_time_limit": settings.WEBHOOK_SOFT_TIME_LIMIT,
+    },
+}
+
 # Initialize Celery app
 celery_app = Celery(
     "product_importer",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["tasks.csv_processor", "tasks.webhook_sender"]
+    include=["tasks.csv_processor", "tasks.sharded_import", "tasks.product_delete", "tasks.webhook_sender"]
 )
 
 # Celery configuration
@@ -17,8 +46,58 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
-    task_time_limit=3600,  # 1 hour max
-    task_soft_time_limit=3300,  # 55 minutes soft limit
+    task_time_limit=settings.IMPORT_TIME_LIMIT,
+    task_soft_time_limit=settings.IMPORT_SOFT_TIME_LIMIT,
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=50,
+    # A worker started without -Q consumes all of these
+    task_queues=[Queue(IMPORT_QUEUE), Queue(IMPORT_SMALL_QUEUE), Queue(WEBHOOK_QUEUE)],
+    task_default_queue=IMPORT_QUEUE,
+    task_routes={
+        "tasks.csv_processor.*": {"queue": IMPORT_QUEUE},
+        "tasks.sharded_import.*": {"queue": IMPORT_QUEUE},
+        # Bulk deletes are short or resume after the soft limit, so they skip the long imports
+        "tasks.product_delete.*": {"queue": IMPORT_SMALL_QUEUE},
+        "tasks.webhook_sender.*": {"queue": WEBHOOK_QUEUE},
+    },
 )
+
+
+def import_queue(file_size: int) -> str:
+    """
+    Pick the queue for importing a file of the given size
+
+    Small files get their own queue so they are not stuck behind large
+    imports. A size of 0 (unknown) counts as large.
+
+    Args:
+        file_size: Size of the uploaded file in bytes
+
+    Returns:
+        str: Queue name
+    """
+    if 0 < file_size <= settings.IMPORT_SMALL_MAX_BYTES:
+        return IMPORT_SMALL_QUEUE
+    return IMPORT_QUEUE
+
+
+@celeryd_init.connect
+def configure_queue_worker(conf=None, options=None, **kwargs):
+    """
+    Apply QUEUE_WORKER_SETTINGS to a worker started with -Q
+
+    A worker consuming several of the queues gets the sum of their
+    concurrency and the largest of their time limits. Options given on the
+    command line, such as --concurrency, still take precedence.
+    """
+    queues = (options or {}).get("queues") or []
+    if isinstance(queues, str):
+        queues = queues.split(",")
+    queue_settings = [QUEUE_WORKER_SETTINGS[queue] for queue in queues if queue in QUEUE_WORKER_SETTINGS]
+    if not queue_settings:
+        return
+
+    conf.worker_concurrency = sum(s["concurrency"] for s in queue_settings)
+    conf.worker_prefetch_multiplier = min(s["prefetch_multiplier"] for s in queue_settings)
+    conf.task_time_limit = max(s["time_limit"] for s in queue_settings)
+    conf.task_soft_time_limit = max(s["soft_time_limit"] for s in queue_settings)
@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
@@ -14,6 +16,41 @@ engine = create_engine(
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url():
+    """
+    Derive the asyncpg URL and connect arguments from DATABASE_URL
+
+    Returns:
+        tuple: (URL for the asyncpg driver, connect_args)
+    """
+    url = make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg")
+    connect_args = {}
+    # asyncpg takes the libpq sslmode values as its ssl argument and has no
+    # channel_binding option (Neon connection strings carry both)
+    if "sslmode" in url.query:
+        connect_args["ssl"] = url.query["sslmode"]
+    url = url.difference_update_query(["sslmode", "channel_binding"])
+    return url, connect_args
+
+
+# Async engine for the API routes; Celery tasks keep the sync engine above.
+# Requests waiting for a connection await instead of holding a thread.
+# The asyncpg pre-ping costs three round trips per checkout (BEGIN, query,
+# ROLLBACK), so connections are recycled by age instead: one idle long
+# enough for the server to drop it is always past ASYNC_DB_POOL_RECYCLE.
+_async_url, _async_connect_args = _async_database_url()
+async_engine = create_async_engine(
+    _async_url,
+    connect_args=_async_connect_args,
+    pool_recycle=settings.ASYNC_DB_POOL_RECYCLE,
+    pool_size=settings.ASYNC_DB_POOL_SIZE,
+    max_overflow=settings.ASYNC_DB_MAX_OVERFLOW
+)
+
+# Objects stay loaded after commit: expired attributes cannot lazy-load in async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
@@ -27,6 +64,21 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables"""
+    # Trigram operator classes used by the product search indexes
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
     Base.metadata.create_all(bind=engine)
+
+    # create_all skips tables that already exist, so add indexes defined since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
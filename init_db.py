@@ -5,13 +5,13 @@ import sys
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from database import Base, engine
+from database import init_db
 from models.product import Product
 from models.webhook import Webhook
 
 try:
     # Create all tables
-    Base.metadata.create_all(bind=engine)
+    init_db()
     print("Database tables created successfully!")
     print("Tables: products, webhooks")
 except Exception as e:
@@ -1,4 +1,5 @@
 from models.product import Product
 from models.webhook import Webhook
+from models.import_job import ImportJob
 
-__all__ = ["Product", "Webhook"]
+__all__ = ["Product", "Webhook", "ImportJob"]
@@ -0,0 +1,73 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+# Timed phases of an import, stored as <phase>_seconds columns
+IMPORT_PHASES = ("upload", "parse", "validate", "fetch", "upsert", "commit")
+
+
+class ImportJob(Base):
+    """Import job model for keeping the history and timings of every import"""
+    __tablename__ = "import_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(String(64), unique=True, nullable=False, index=True)
+    file_name = Column(String(255), nullable=True)
+    file_format = Column(String(20), nullable=True)
+    file_size = Column(BigInteger, default=0)
+    load_mode = Column(String(20), nullable=True)
+    import_mode = Column(String(20), default="upsert")  # upsert, replace
+    status = Column(String(20), default="running", index=True)  # running, complete, error
+    error_message = Column(String(1000), nullable=True)
+    worker_host = Column(String(255), nullable=True)
+    
+    # Row counts
+    rows_total = Column(Integer, default=0)
+    rows_created = Column(Integer, default=0)
+    rows_updated = Column(Integer, default=0)
+    rows_unchanged = Column(Integer, default=0)
+    rows_rejected = Column(Integer, default=0)
+    rows_duplicate = Column(Integer, default=0)
+    rows_removed = Column(Integer, default=0)
+    
+    # Wall time per phase, in seconds
+    upload_seconds = Column(Float, default=0)
+    parse_seconds = Column(Float, default=0)
+    validate_seconds = Column(Float, default=0)
+    fetch_seconds = Column(Float, default=0)
+    upsert_seconds = Column(Float, default=0)
+    commit_seconds = Column(Float, default=0)
+    total_seconds = Column(Float, default=0)
+    rows_per_second = Column(Float, default=0)
+    
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            "id": self.id,
+            "task_id": self.task_id,
+            "file_name": self.file_name,
+            "file_format": self.file_format,
+            "file_size": self.file_size,
+            "load_mode": self.load_mode,
+            "import_mode": self.import_mode,
+            "status": self.status,
+            "error_message": self.error_message,
+            "worker_host": self.worker_host,
+            "rows": {
+                "total": self.rows_total,
+                "created": self.rows_created,
+                "updated": self.rows_updated,
+                "unchanged": self.rows_unchanged,
+                "rejected": self.rows_rejected,
+                "duplicate": self.rows_duplicate,
+                "removed": self.rows_removed,
+            },
+            "phases": {phase: getattr(self, f"{phase}_seconds") for phase in IMPORT_PHASES},
+            "total_seconds": self.total_seconds,
+            "rows_per_second": self.rows_per_second,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
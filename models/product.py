@@ -17,11 +17,30 @@ class Product(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
-    # Create case-insensitive index for SKU
+    # Create case-insensitive index for SKU, and one matching the
+    # (created_at, id) order of keyset pagination
     __table_args__ = (
         Index('ix_products_sku_lower', func.lower(sku), unique=True),
+        Index('ix_products_created_at_id', created_at, id),
+        # Search: trigram indexes serve ILIKE '%term%', the pattern index SKU prefixes
+        Index('ix_products_sku_prefix', func.lower(sku).label('sku_lower'), postgresql_ops={'sku_lower': 'text_pattern_ops'}),
+        Index('ix_products_sku_trgm', sku, postgresql_using='gin', postgresql_ops={'sku': 'gin_trgm_ops'}),
+        Index('ix_products_name_trgm', name, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index(
+            'ix_products_description_trgm', description,
+            postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}
+        ),
     )
     
+    # Fields of to_dict in order; list endpoints select these columns as plain
+    # rows and serialize them with orjson, which writes the same datetime format
+    API_FIELDS = ("id", "sku", "name", "description", "price", "quantity", "is_active", "created_at", "updated_at")
+
+    @classmethod
+    def api_columns(cls) -> list:
+        """Columns of API_FIELDS, for selecting rows instead of entities"""
+        return [getattr(cls, name) for name in cls.API_FIELDS]
+
     def to_dict(self):
         """Convert model to dictionary"""
         return {
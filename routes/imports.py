@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from database import get_db
+from models import ImportJob
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get("/imports")
+def get_imports(
+    limit: int = Query(50, ge=1, le=500),
+    status: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get import history, newest first
+    
+    Args:
+        limit: Maximum number of jobs
+        status: Filter by status (queued, running, complete, error)
+        db: Database session
+        
+    Returns:
+        List of import jobs with row counts and phase timings
+    """
+    query = db.query(ImportJob)
+    if status:
+        query = query.filter(ImportJob.status == status)
+    jobs = query.order_by(ImportJob.started_at.desc(), ImportJob.id.desc()).limit(limit).all()
+    return {"imports": [job.to_dict() for job in jobs]}
+
+
+@router.get("/imports/{import_id}")
+def get_import(import_id: int, db: Session = Depends(get_db)):
+    """Get a single import job"""
+    job = db.query(ImportJob).filter(ImportJob.id == import_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job.to_dict()
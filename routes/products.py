@@ -1,10 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, tuple_
+from database import get_async_db
 from models import Product
+from utils.pagination import encode_cursor, decode_cursor
+from utils.product_counts import count_products, COUNT_STRATEGIES
+from utils.catalog_version import CatalogVersion
+from utils import ProgressTracker
+from utils.product_search import search_filter, search_ordering
+from utils.response_cache import ResponseCache
+from utils.etags import list_etag, product_etag, etag_matches, with_etag, not_modified
+from utils.product_batch import create_products, update_products
+from utils.product_export import export_products, EXPORT_FORMATS
+from config import settings
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+import uuid
 
 router = APIRouter()
 
@@ -26,75 +39,254 @@ class ProductUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class ProductBatchCreate(BaseModel):
+    products: List[ProductCreate]
+
+
+class ProductBatchUpdateItem(ProductUpdate):
+    id: int
+
+
+class ProductBatchUpdate(BaseModel):
+    products: List[ProductBatchUpdateItem]
+
+
+def _check_batch_size(items: list):
+    """Reject empty batches and batches above the configured maximum"""
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch contains no products")
+    if len(items) > settings.PRODUCT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds the maximum of {settings.PRODUCT_BATCH_MAX_ITEMS} products"
+        )
+
+
+def _batch_response(results: list, status: str) -> dict:
+    """Summarize per-item batch results"""
+    return {
+        "results": results,
+        status: sum(1 for result in results if result["status"] == status),
+        "failed": sum(1 for result in results if result["status"] == "error"),
+    }
+
+
 @router.get("/products")
-def get_products(
+async def get_products(
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=1, le=100),
     search: Optional[str] = None,
     is_active: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    count: str = "exact",
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get paginated list of products with optional filtering
+
+    Products are ordered newest first by (created_at, id). Passing the
+    next_cursor or prev_cursor of a response fetches the adjacent page with
+    a keyset seek on the matching index, so deep pages cost the same as the
+    first one. page still works for jumping to a page number, but uses
+    OFFSET and gets slower the deeper it goes.
+
+    A search matches SKU, name and description through trigram indexes and
+    sorts results by relevance (exact SKU, SKU prefix, name similarity).
+    Search results page by page number only; cursors are not returned.
+
+    The total can be exact, estimated from planner statistics, or cached per
+    filter until the next write (see count_products); total_kind says which.
+
+    The first PRODUCT_CACHE_PAGES pages of every filter set are served from
+    the Redis response cache until the catalog changes. Responses carry a
+    weak ETag of the catalog version and parameters; a matching
+    If-None-Match gets 304 before any query runs.
     
     Args:
-        page: Page number (1-indexed)
+        page: Page number (1-indexed); ignored when a cursor is given
         per_page: Items per page
-        search: Search term for SKU, name, or description
+        search: Search term for SKU, name, or description (SKU prefix if shorter than 3 characters)
         is_active: Filter by active status
+        cursor: next_cursor or prev_cursor from a previous response
+        count: Count strategy: "exact", "estimated" or "cached"
+        if_none_match: ETag of the client's copy
         db: Database session
         
     Returns:
         Paginated product list
     """
-    query = db.query(Product)
+    params = {
+        "page": page,
+        "per_page": per_page,
+        "search": search.strip().lower() if search and search.strip() else None,
+        "is_active": is_active,
+        "cursor": cursor,
+        "count": count
+    }
+    version = await ResponseCache.version()
+    etag = list_etag(version, params) if version is not None else None
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # Serve the first pages from the response cache
+    cache_key = None
+    if not cursor and page <= settings.PRODUCT_CACHE_PAGES:
+        cache_key = ResponseCache.key("products", params, version)
+        cached = await ResponseCache.get(cache_key)
+        if cached is not None:
+            return with_etag(cached, etag)
+
+    # Plain rows instead of entities: no identity map or to_dict per product
+    query = select(*Product.api_columns())
+    filters = {}
     
     # Apply filters
+    search = search.strip() if search else None
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Product.sku.ilike(search_term),
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term)
-            )
-        )
+        filters["search"] = search
+        query = query.where(search_filter(search))
     
     if is_active is not None:
-        query = query.filter(Product.is_active == is_active)
+        filters["is_active"] = is_active
+        query = query.where(Product.is_active == is_active)
     
     # Get total count
-    total = query.count()
+    if count not in COUNT_STRATEGIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid count strategy: {count} (expected one of {', '.join(COUNT_STRATEGIES)})"
+        )
+    total, total_kind = await count_products(db, query, count, filters)
     
-    # Apply pagination
-    offset = (page - 1) * per_page
-    products = query.order_by(Product.created_at.desc()).offset(offset).limit(per_page).all()
+    # Apply pagination; one extra row tells whether there is a further page
+    direction = None
+    if search:
+        # Relevance order has no keyset to seek on
+        cursor = None
+        query = query.order_by(*search_ordering(search)).offset((page - 1) * per_page)
+    elif cursor:
+        try:
+            created_at, product_id, direction = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        position = tuple_(Product.created_at, Product.id)
+        if direction == "next":
+            query = query.where(position < tuple_(created_at, product_id))
+            query = query.order_by(Product.created_at.desc(), Product.id.desc())
+        else:
+            # Walk back towards newer rows, then restore the page order
+            query = query.where(position > tuple_(created_at, product_id))
+            query = query.order_by(Product.created_at.asc(), Product.id.asc())
+    else:
+        offset = (page - 1) * per_page
+        query = query.order_by(Product.created_at.desc(), Product.id.desc()).offset(offset)
+
+    products = (await db.execute(query.limit(per_page + 1))).all()
+    has_more = len(products) > per_page
+    products = products[:per_page]
+    if direction == "prev":
+        products.reverse()
+
+    # Moving in one direction means there is a page in the other one
+    next_cursor = None
+    prev_cursor = None
+    if products and not search:
+        if has_more or direction == "prev":
+            next_cursor = encode_cursor(products[-1].created_at, products[-1].id, "next")
+        if has_more if direction == "prev" else (direction == "next" or page > 1):
+            prev_cursor = encode_cursor(products[0].created_at, products[0].id, "prev")
     
-    return {
-        "products": [p.to_dict() for p in products],
+    result = {
+        "products": [dict(zip(Product.API_FIELDS, row)) for row in products],
         "total": total,
-        "page": page,
+        "total_kind": total_kind,
+        "page": None if cursor else page,
         "per_page": per_page,
-        "total_pages": (total + per_page - 1) // per_page
+        "total_pages": (total + per_page - 1) // per_page,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor
     }
+    if cache_key is not None:
+        return with_etag(await ResponseCache.store(cache_key, result, etag), etag)
+    return with_etag(ORJSONResponse(content=result), etag)
+
+
+@router.get("/products/export")
+async def export_products_file(
+    format: str = "csv",
+    search: Optional[str] = None,
+    is_active: Optional[bool] = None
+):
+    """
+    Download the catalog as CSV or NDJSON
+
+    Rows are streamed from a server-side cursor, so exports of any size use
+    constant memory. The CSV can be imported again unchanged.
+
+    Args:
+        format: "csv" or "ndjson"
+        search: Search term, as for GET /products
+        is_active: Filter by active status
+
+    Returns:
+        Streaming file download
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid export format: {format} (expected one of {', '.join(EXPORT_FORMATS)})"
+        )
+
+    search = search.strip() if search else None
+    return StreamingResponse(
+        export_products(format, search=search, is_active=is_active),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'}
+    )
 
 
 @router.get("/products/{product_id}")
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Get single product by ID"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def get_product(
+    product_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get single product by ID
+
+    Served from the response cache until the catalog changes. The weak ETag
+    comes from updated_at; a matching If-None-Match gets 304 from the cached
+    entry, or else after looking up only updated_at.
+    """
+    cache_key = ResponseCache.key("product", {"id": product_id}, await ResponseCache.version())
+    cached = await ResponseCache.get(cache_key)
+    if cached is not None:
+        if etag_matches(if_none_match, cached.headers.get("etag")):
+            return not_modified(cached.headers["etag"])
+        return with_etag(cached, cached.headers.get("etag"))
+
+    if if_none_match:
+        updated_at = await db.scalar(select(Product.updated_at).where(Product.id == product_id))
+        if updated_at is not None:
+            etag = product_etag(product_id, updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product.to_dict()
+    etag = product_etag(product.id, product.updated_at)
+    return with_etag(await ResponseCache.store(cache_key, product.to_dict(), etag), etag)
 
 
 @router.post("/products")
-def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
+async def create_product(product_data: ProductCreate, db: AsyncSession = Depends(get_async_db)):
     """Create new product"""
     # Check if SKU already exists (case-insensitive)
-    existing = db.query(Product).filter(
+    existing = await db.scalar(select(Product.id).where(
         func.lower(Product.sku) == product_data.sku.lower()
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(status_code=400, detail="Product with this SKU already exists")
@@ -110,24 +302,73 @@ def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
     )
     
     db.add(product)
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await db.refresh(product)
+    await CatalogVersion.bump_async()
     
     # Trigger webhook
     from tasks import send_webhook_notification
-    send_webhook_notification.delay("product.created", product.to_dict())
+    await run_in_threadpool(send_webhook_notification.delay, "product.created", product.to_dict())
     
     return product.to_dict()
 
 
+@router.post("/products/batch")
+async def create_products_batch(batch: ProductBatchCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create up to PRODUCT_BATCH_MAX_ITEMS products in one request
+
+    Duplicate SKUs are looked up in one query and the products inserted in one
+    statement and transaction. Items that fail (existing or repeated SKU,
+    invalid fields) are reported in their result without affecting the rest.
+    One webhook task covers all created products.
+    """
+    _check_batch_size(batch.products)
+
+    results, created = await create_products(db, [item.model_dump() for item in batch.products])
+    await db.commit()
+
+    if created:
+        await CatalogVersion.bump_async()
+        # Trigger webhooks
+        from tasks import send_webhook_batch
+        await run_in_threadpool(send_webhook_batch.delay, "product.created", created)
+
+    return _batch_response(results, "created")
+
+
+@router.patch("/products/batch")
+async def update_products_batch(batch: ProductBatchUpdate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Update up to PRODUCT_BATCH_MAX_ITEMS products in one request
+
+    Each item holds a product id and the fields to change, like
+    PUT /products/{id}. All items are applied by one UPDATE in one
+    transaction; items that would change nothing are reported as unchanged.
+    One webhook task covers all updated products.
+    """
+    _check_batch_size(batch.products)
+
+    results, updated = await update_products(db, [item.model_dump() for item in batch.products])
+    await db.commit()
+
+    if updated:
+        await CatalogVersion.bump_async()
+        # Trigger webhooks
+        from tasks import send_webhook_batch
+        await run_in_threadpool(send_webhook_batch.delay, "product.updated", updated)
+
+    return _batch_response(results, "updated")
+
+
 @router.put("/products/{product_id}")
-def update_product(
+async def update_product(
     product_id: int,
     product_data: ProductUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update existing product"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
@@ -143,39 +384,59 @@ def update_product(
     if product_data.is_active is not None:
         product.is_active = product_data.is_active
     
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await db.refresh(product)
+    await CatalogVersion.bump_async()
     
     # Trigger webhook
     from tasks import send_webhook_notification
-    send_webhook_notification.delay("product.updated", product.to_dict())
+    await run_in_threadpool(send_webhook_notification.delay, "product.updated", product.to_dict())
     
     return product.to_dict()
 
 
 @router.delete("/products/{product_id}")
-def delete_product(product_id: int, db: Session = Depends(get_db)):
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete single product"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     product_dict = product.to_dict()
-    db.delete(product)
-    db.commit()
+    await db.delete(product)
+    await db.commit()
+    await CatalogVersion.bump_async()
     
     # Trigger webhook
     from tasks import send_webhook_notification
-    send_webhook_notification.delay("product.deleted", product_dict)
+    await run_in_threadpool(send_webhook_notification.delay, "product.deleted", product_dict)
     
     return {"message": "Product deleted successfully"}
 
 
 @router.delete("/products")
-def bulk_delete_products(db: Session = Depends(get_db)):
-    """Delete all products"""
-    count = db.query(Product).count()
-    db.query(Product).delete()
-    db.commit()
+async def bulk_delete_products(search: Optional[str] = None, is_active: Optional[bool] = None):
+    """
+    Delete all products, or those matching the given filters, in the background
+
+    The delete runs as a Celery job (see delete_products) and reports progress
+    through GET /progress/{task_id}; a product.bulk_deleted webhook carries the
+    count when it finishes.
     
-    return {"message": f"Deleted {count} products successfully", "count": count}
+    Args:
+        search: Search term, as for GET /products
+        is_active: Delete only active or only inactive products
+    """
+    task_id = str(uuid.uuid4())
+    await run_in_threadpool(ProgressTracker.set_progress, task_id, 0, "Queued for deletion...", 100)
+    
+    from tasks import delete_products
+    await run_in_threadpool(delete_products.delay, task_id, search=search, is_active=is_active)
+    
+    return JSONResponse(
+        status_code=202,
+        content={
+            "message": "Deletion started.",
+            "task_id": task_id
+        }
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from utils import ProgressTracker
 import asyncio
@@ -7,6 +7,24 @@ import json
 router = APIRouter()
 
 
+@router.get("/progress/{task_id}/status")
+async def get_progress_status(task_id: str):
+    """
+    Get a single progress snapshot for a task
+    
+    Args:
+        task_id: Task identifier
+        
+    Returns:
+        Progress data including bytes_processed/total_bytes and
+        rows_processed/estimated_total_rows for imports
+    """
+    progress_data = ProgressTracker.get_progress(task_id)
+    if not progress_data:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return progress_data
+
+
 @router.get("/progress/{task_id}")
 async def get_progress(task_id: str):
     """
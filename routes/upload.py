@@ -1,30 +1,147 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, FileResponse
+from sqlalchemy.orm import Session
 import os
+import time
 import uuid
 from config import settings
-from tasks import process_csv_file
-from utils import validate_csv_headers, ProgressTracker
-import pandas as pd
+from celery_app import import_queue
+from database import get_db
+from tasks import process_csv_file, import_csv_sharded
+from tasks.csv_processor import IMPORT_MODES
+from utils import validate_csv_headers, ProgressTracker, ImportCheckpoint, UploadStatus
+from utils.csv_reader import parse_header_line, open_csv_stream, read_csv_header, upload_extension, UPLOAD_EXTENSIONS
+from utils.columnar_reader import is_columnar_file
+from utils.rejected_rows import rejected_rows_path
+from utils.import_jobs import record_upload
 
 router = APIRouter()
 
+# A running import saves a checkpoint after every chunk; one that has not
+# done so for this long is assumed to have lost its worker
+RESUME_STALE_SECONDS = 300
+
+# A header row must fit in this many bytes
+MAX_HEADER_BYTES = 64 * 1024
+
+# How often a streaming upload flushes to disk and tells its import task
+STREAM_FLUSH_BYTES = 1024 * 1024
+
+
+def _check_header(header: bytes):
+    """
+    Validate the header row of an upload before the rest of it is stored
+
+    Args:
+        header: Raw bytes of the first line
+
+    Raises:
+        HTTPException: If the header is empty or misses required columns
+    """
+    try:
+        headers = parse_header_line(header)
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV format: {str(e)}")
+    _check_columns(headers)
+
+
+def _check_import_mode(mode: str):
+    """
+    Validate the import mode of an upload
+
+    Args:
+        mode: Requested import mode
+
+    Raises:
+        HTTPException: If the mode is not one of IMPORT_MODES
+    """
+    if mode not in IMPORT_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid import mode: {mode} (expected one of {', '.join(IMPORT_MODES)})"
+        )
+
+
+def _check_columns(headers: list):
+    """
+    Validate the normalized column names of an upload
+
+    Args:
+        headers: Lowercased column names
+
+    Raises:
+        HTTPException: If there are no columns or required ones are missing
+    """
+    if not any(headers):
+        raise HTTPException(status_code=400, detail="CSV file is empty")
+    is_valid, error_msg = validate_csv_headers(headers)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+
+
+def _is_sharded(file_size: int) -> bool:
+    """Whether a plain CSV file of this size is imported in shards"""
+    return settings.IMPORT_SHARD_COUNT > 1 and file_size >= settings.IMPORT_SHARD_MIN_BYTES
+
+
+def _start_import(file_path: str, task_id: str, file_size: int, mode: str, plain_csv: bool = True):
+    """
+    Queue the import of a stored upload
+
+    Large files are split across several workers (only plain CSV files can be
+    split into byte ranges); small ones go to their own queue so they do not
+    wait behind large imports.
+
+    Args:
+        file_path: Path of the stored file
+        task_id: Unique task identifier
+        file_size: Size of the stored file in bytes
+        mode: "upsert" or "replace"
+        plain_csv: The file is an uncompressed CSV
+    """
+    if plain_csv and _is_sharded(file_size):
+        import_csv_sharded.delay(file_path, task_id, import_mode=mode)
+    else:
+        process_csv_file.apply_async(
+            (file_path, task_id), {"import_mode": mode}, queue=import_queue(file_size)
+        )
+
 
 @router.post("/upload")
-async def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(file: UploadFile = File(...), mode: str = "upsert", db: Session = Depends(get_db)):
     """
     Upload CSV file for product import
+
+    Files may be gzip (.csv.gz), zstd (.csv.zst) or single-entry ZIP
+    compressed. They are stored as uploaded and decompressed while importing;
+    the size limit applies to the uploaded bytes. Parquet and Arrow IPC
+    (.arrow, .feather) files are imported without CSV parsing.
+
+    With mode=replace the file is a full catalog snapshot: products missing
+    from it are removed, and the new catalog is swapped in atomically once
+    the whole file is imported.
     
     Args:
         file: CSV file to upload
+        mode: "upsert" (default) or "replace"
+        db: Database session
         
     Returns:
         JSON response with task_id for progress tracking
     """
+    upload_started = time.perf_counter()
     try:
+        _check_import_mode(mode)
+
         # Validate file type
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="Only CSV files are allowed")
+        extension = upload_extension(file.filename or "")
+        if extension is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Only CSV files are allowed ({', '.join(UPLOAD_EXTENSIONS)})"
+            )
+        plain_csv = extension == ".csv"
         
         # Save file in chunks to avoid memory issues
         file_size = 0
@@ -32,7 +149,7 @@ async def upload_csv(file: UploadFile = File(...)):
         
         # Generate unique filename
         file_id = str(uuid.uuid4())
-        file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.csv")
+        file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}{extension}")
         
         try:
             with open(file_path, "wb") as f:
@@ -40,6 +157,9 @@ async def upload_csv(file: UploadFile = File(...)):
                     chunk = await file.read(chunk_size)
                     if not chunk:
                         break
+                    # Validate CSV headers from the first chunk
+                    if file_size == 0 and plain_csv:
+                        _check_header(chunk.split(b"\n", 1)[0][:MAX_HEADER_BYTES])
                     file_size += len(chunk)
                     if file_size > settings.MAX_FILE_SIZE:
                         raise HTTPException(
@@ -52,30 +172,38 @@ async def upload_csv(file: UploadFile = File(...)):
                 os.remove(file_path)
             raise e
         
-        # Validate CSV headers
-        try:
-            df = pd.read_csv(file_path, nrows=1)
-            headers = df.columns.tolist()
-            is_valid, error_msg = validate_csv_headers(headers)
-            
-            if not is_valid:
-                os.remove(file_path)
-                raise HTTPException(status_code=400, detail=error_msg)
-        except pd.errors.EmptyDataError:
+        if file_size == 0:
             os.remove(file_path)
             raise HTTPException(status_code=400, detail="CSV file is empty")
-        except Exception as e:
-            os.remove(file_path)
-            raise HTTPException(status_code=400, detail=f"Invalid CSV format: {str(e)}")
+        
+        # Compressed and columnar headers can only be read once the file is stored
+        if not plain_csv:
+            try:
+                if is_columnar_file(file_path):
+                    _check_columns(read_csv_header(file_path))
+                else:
+                    stream, raw = open_csv_stream(file_path)
+                    with raw, stream:
+                        header = stream.readline(MAX_HEADER_BYTES)
+                    _check_header(header)
+            except HTTPException:
+                os.remove(file_path)
+                raise
+            except Exception as e:
+                os.remove(file_path)
+                raise HTTPException(status_code=400, detail=f"Invalid {extension} file: {str(e)}")
         
         # Generate task ID
         task_id = str(uuid.uuid4())
+        await run_in_threadpool(
+            record_upload, db, task_id, file.filename, file_size, time.perf_counter() - upload_started
+        )
         
         # Initialize progress immediately to avoid "waiting" state
-        ProgressTracker.set_progress(task_id, 0, "Queued for processing...", 100)
+        await run_in_threadpool(ProgressTracker.set_progress, task_id, 0, "Queued for processing...", 100)
         
         # Start background task
-        process_csv_file.delay(file_path, task_id)
+        await run_in_threadpool(_start_import, file_path, task_id, file_size, mode, plain_csv)
         
         return JSONResponse(
             status_code=202,
@@ -89,3 +217,191 @@ async def upload_csv(file: UploadFile = File(...)):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
+
+
+@router.post("/upload/stream")
+async def upload_csv_stream(request: Request, filename: str, mode: str = "upsert", db: Session = Depends(get_db)):
+    """
+    Upload a CSV file as the raw request body and import it while it arrives
+
+    The header row is validated as soon as it is received, so a bad file is
+    rejected before the rest of it is sent. The import task starts right after
+    and follows the file on disk, importing records while the upload continues.
+    Files large enough to be imported in shards (by their Content-Length) are
+    received completely first and then split across workers, like /upload.
+    
+    Args:
+        request: Request whose body is the CSV file
+        filename: Original file name
+        mode: "upsert" (default) or "replace"
+        db: Database session
+        
+    Returns:
+        JSON response with task_id for progress tracking
+    """
+    if upload_extension(filename) != ".csv":
+        raise HTTPException(status_code=400, detail="Only CSV files are allowed")
+    _check_import_mode(mode)
+    
+    expected_bytes = int(request.headers.get("content-length") or 0)
+    if expected_bytes > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE} bytes"
+        )
+    
+    file_id = str(uuid.uuid4())
+    file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.csv")
+    task_id = str(uuid.uuid4())
+    header_checked = False
+    task_started = False
+    # Sharded imports split the finished file, so they cannot follow the upload
+    follow_upload = not _is_sharded(expected_bytes)
+    file_size = 0
+    flushed_size = 0
+    upload_started = time.perf_counter()
+    
+    try:
+        with open(file_path, "wb") as f:
+            async for chunk in request.stream():
+                file_size += len(chunk)
+                if file_size > settings.MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE} bytes"
+                    )
+                f.write(chunk)
+                
+                if not header_checked:
+                    # Wait for the complete header row, then validate it and start importing
+                    f.flush()
+                    with open(file_path, "rb") as written:
+                        header = written.readline(MAX_HEADER_BYTES + 1)
+                    if not header.endswith(b"\n"):
+                        if len(header) > MAX_HEADER_BYTES:
+                            raise HTTPException(status_code=400, detail="CSV header row is too long")
+                        continue
+                    _check_header(header)
+                    header_checked = True
+                    if not follow_upload:
+                        continue
+                    
+                    # Redis and broker round-trips run off the event loop
+                    await run_in_threadpool(UploadStatus.update, task_id, file_size, expected_bytes)
+                    await run_in_threadpool(ProgressTracker.set_progress, task_id, 0, "Receiving file...", 100)
+                    await run_in_threadpool(record_upload, db, task_id, filename, expected_bytes)
+                    await run_in_threadpool(
+                        process_csv_file.apply_async,
+                        (file_path, task_id),
+                        {"follow_upload": True, "import_mode": mode},
+                        queue=import_queue(expected_bytes)
+                    )
+                    task_started = True
+                    flushed_size = file_size
+                elif task_started and file_size - flushed_size >= STREAM_FLUSH_BYTES:
+                    f.flush()
+                    await run_in_threadpool(UploadStatus.update, task_id, file_size, expected_bytes)
+                    flushed_size = file_size
+        
+        if not task_started:
+            if not header_checked:
+                # Whole file arrived without a newline after the header
+                with open(file_path, "rb") as written:
+                    _check_header(written.readline(MAX_HEADER_BYTES + 1))
+            await run_in_threadpool(
+                record_upload, db, task_id, filename, file_size, time.perf_counter() - upload_started
+            )
+            await run_in_threadpool(ProgressTracker.set_progress, task_id, 0, "Queued for processing...", 100)
+            await run_in_threadpool(_start_import, file_path, task_id, file_size, mode)
+        else:
+            await run_in_threadpool(
+                record_upload, db, task_id, filename, file_size, time.perf_counter() - upload_started
+            )
+            await run_in_threadpool(UploadStatus.complete, task_id, file_size)
+    
+    except Exception as e:
+        if task_started:
+            # The import task removes the file once it sees the failure
+            await run_in_threadpool(
+                UploadStatus.fail, task_id, str(e.detail) if isinstance(e, HTTPException) else str(e)
+            )
+        elif os.path.exists(file_path):
+            os.remove(file_path)
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
+    
+    return JSONResponse(
+        status_code=202,
+        content={
+            "message": "File uploaded successfully. Processing started.",
+            "task_id": task_id
+        }
+    )
+
+
+@router.post("/upload/{task_id}/resume")
+async def resume_upload(task_id: str):
+    """
+    Resume an interrupted import from its last checkpoint
+    
+    Args:
+        task_id: Task identifier returned by the upload
+        
+    Returns:
+        JSON response with the task_id and the row the import resumes at
+    """
+    checkpoint = await run_in_threadpool(ImportCheckpoint.get, task_id)
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="No checkpoint found for this import")
+    
+    if not os.path.exists(checkpoint["file_path"]):
+        raise HTTPException(status_code=410, detail="Uploaded file is no longer available")
+    
+    progress = await run_in_threadpool(ProgressTracker.get_progress, task_id)
+    is_failed = progress is None or progress.get("status") == "error"
+    is_stale = time.time() - checkpoint["saved_at"] > RESUME_STALE_SECONDS
+    if not (is_failed or is_stale):
+        raise HTTPException(status_code=409, detail="Import is still running")
+    
+    await run_in_threadpool(
+        ProgressTracker.set_progress, task_id, 0, f"Queued to resume at row {checkpoint['rows']}...", 100
+    )
+    await run_in_threadpool(
+        process_csv_file.apply_async,
+        (checkpoint["file_path"], task_id, checkpoint["load_mode"]),
+        {"import_mode": checkpoint.get("import_mode", "upsert")},
+        queue=import_queue(os.path.getsize(checkpoint["file_path"]))
+    )
+    
+    return JSONResponse(
+        status_code=202,
+        content={
+            "message": "Import resumed from last checkpoint.",
+            "task_id": task_id,
+            "resume_row": checkpoint["rows"]
+        }
+    )
+
+
+@router.get("/upload/{task_id}/rejected")
+async def download_rejected_rows(task_id: str):
+    """
+    Download the rows an import rejected
+
+    The file has the original line number and the rejection reason in front of
+    the original columns. After correcting it, it can be uploaded again on its
+    own; only those rows are imported and their line numbers are kept. Files
+    are kept for REJECTED_ROWS_TTL_DAYS.
+    
+    Args:
+        task_id: Task identifier returned by the upload
+        
+    Returns:
+        CSV file of rejected rows
+    """
+    path = rejected_rows_path(task_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No rejected rows for this import")
+    
+    return FileResponse(path, media_type="text/csv", filename=f"rejected-{task_id}.csv")
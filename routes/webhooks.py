@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import Webhook
 from pydantic import BaseModel
 from typing import Optional
@@ -24,14 +26,14 @@ class WebhookUpdate(BaseModel):
 
 
 @router.get("/webhooks")
-def get_webhooks(db: Session = Depends(get_db)):
+async def get_webhooks(db: AsyncSession = Depends(get_async_db)):
     """Get all webhooks"""
-    webhooks = db.query(Webhook).order_by(Webhook.created_at.desc()).all()
+    webhooks = (await db.scalars(select(Webhook).order_by(Webhook.created_at.desc()))).all()
     return {"webhooks": [w.to_dict() for w in webhooks]}
 
 
 @router.post("/webhooks")
-def create_webhook(webhook_data: WebhookCreate, db: Session = Depends(get_db)):
+async def create_webhook(webhook_data: WebhookCreate, db: AsyncSession = Depends(get_async_db)):
     """Create new webhook"""
     # Validate URL
     if not validate_url(webhook_data.url):
@@ -58,20 +60,20 @@ def create_webhook(webhook_data: WebhookCreate, db: Session = Depends(get_db)):
     )
     
     db.add(webhook)
-    db.commit()
-    db.refresh(webhook)
+    await db.commit()
+    await db.refresh(webhook)
     
     return webhook.to_dict()
 
 
 @router.put("/webhooks/{webhook_id}")
-def update_webhook(
+async def update_webhook(
     webhook_id: int,
     webhook_data: WebhookUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update existing webhook"""
-    webhook = db.query(Webhook).filter(Webhook.id == webhook_id).first()
+    webhook = await db.get(Webhook, webhook_id)
     if not webhook:
         raise HTTPException(status_code=404, detail="Webhook not found")
     
@@ -98,29 +100,29 @@ def update_webhook(
     if webhook_data.is_enabled is not None:
         webhook.is_enabled = webhook_data.is_enabled
     
-    db.commit()
-    db.refresh(webhook)
+    await db.commit()
+    await db.refresh(webhook)
     
     return webhook.to_dict()
 
 
 @router.delete("/webhooks/{webhook_id}")
-def delete_webhook(webhook_id: int, db: Session = Depends(get_db)):
+async def delete_webhook(webhook_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete webhook"""
-    webhook = db.query(Webhook).filter(Webhook.id == webhook_id).first()
+    webhook = await db.get(Webhook, webhook_id)
     if not webhook:
         raise HTTPException(status_code=404, detail="Webhook not found")
     
-    db.delete(webhook)
-    db.commit()
+    await db.delete(webhook)
+    await db.commit()
     
     return {"message": "Webhook deleted successfully"}
 
 
 @router.post("/webhooks/{webhook_id}/test")
-def test_webhook(webhook_id: int, db: Session = Depends(get_db)):
+async def test_webhook(webhook_id: int, db: AsyncSession = Depends(get_async_db)):
     """Test webhook by sending a test payload"""
-    webhook = db.query(Webhook).filter(Webhook.id == webhook_id).first()
+    webhook = await db.get(Webhook, webhook_id)
     if not webhook:
         raise HTTPException(status_code=404, detail="Webhook not found")
     
@@ -135,8 +137,9 @@ def test_webhook(webhook_id: int, db: Session = Depends(get_db)):
     }
     
     try:
-        # Send test request
-        response = requests.post(
+        # Send test request (blocking, so off the event loop)
+        response = await run_in_threadpool(
+            requests.post,
             webhook.url,
             json=test_payload,
             timeout=10,
@@ -145,7 +148,7 @@ def test_webhook(webhook_id: int, db: Session = Depends(get_db)):
         
         # Update last triggered time
         webhook.last_triggered_at = datetime.utcnow()
-        db.commit()
+        await db.commit()
         
         return {
             "message": "Webhook test successful",
@@ -1,7 +1,8 @@
 #!/bin/bash
 
-# Start Celery Worker in background
-celery -A celery_app worker --loglevel=info --concurrency=1 &
+# Start Celery Workers in background: one for imports, one for webhook deliveries
+celery -A celery_app worker --loglevel=info --concurrency=1 -Q imports,imports.small -n imports@%h &
+celery -A celery_app worker --loglevel=info --concurrency=2 -Q webhooks -n webhooks@%h &
 
 # Start Web Server
 uvicorn app:app --host 0.0.0.0 --port $PORT --proxy-headers
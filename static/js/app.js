@@ -1,8 +1,12 @@
 // API Base URL
 const API_BASE = '/api';
 
+// Accepted upload formats; compressed and columnar files are sent as multipart uploads
+const MULTIPART_EXTENSIONS = ['.csv.gz', '.csv.zst', '.zip', '.parquet', '.arrow', '.feather'];
+
 // State
 let currentPage = 1;
+let currentCursor = null;  // Keyset cursor of the current page (null: use page number)
 let currentSearch = '';
 let currentStatus = '';
 let editingProductId = null;
@@ -48,19 +52,30 @@ function initializeUpload() {
 }
 
 async function handleFileUpload(file) {
-    if (!file.name.endsWith('.csv')) {
-        showNotification('Please upload a CSV file', 'error');
+    const fileName = file.name.toLowerCase();
+    const isMultipart = MULTIPART_EXTENSIONS.some(ext => fileName.endsWith(ext));
+    if (!isMultipart && !fileName.endsWith('.csv')) {
+        showNotification('Please upload a CSV, compressed CSV, Parquet or Arrow file', 'error');
         return;
     }
 
-    const formData = new FormData();
-    formData.append('file', file);
-
     try {
-        const response = await fetch(`${API_BASE}/upload`, {
-            method: 'POST',
-            body: formData
-        });
+        let response;
+        if (isMultipart) {
+            const formData = new FormData();
+            formData.append('file', file);
+            response = await fetch(`${API_BASE}/upload`, {
+                method: 'POST',
+                body: formData
+            });
+        } else {
+            // Send the raw file so the server can start importing while it uploads
+            response = await fetch(`${API_BASE}/upload/stream?filename=${encodeURIComponent(file.name)}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'text/csv' },
+                body: file
+            });
+        }
 
         const data = await response.json();
 
@@ -96,6 +111,12 @@ function startProgressTracking(taskId) {
         if (data.status === 'complete') {
             eventSource.close();
             showNotification(data.message || 'Import completed successfully!', 'success');
+            if (data.rejected_url) {
+                // Keep the panel open with a link to the rejected rows
+                progressStatus.innerHTML = `Complete. <a href="${data.rejected_url}" download>Download rejected rows</a>, fix them and upload that file again.`;
+                loadProducts();
+                return;
+            }
             setTimeout(() => {
                 progressContainer.classList.remove('active');
                 loadProducts();
@@ -119,6 +140,7 @@ function startProgressTracking(taskId) {
 function initializeProducts() {
     const addProductBtn = document.getElementById('addProductBtn');
     const bulkDeleteBtn = document.getElementById('bulkDeleteBtn');
+    const exportBtn = document.getElementById('exportBtn');
     const searchInput = document.getElementById('searchInput');
     const statusFilter = document.getElementById('statusFilter');
     const productModal = document.getElementById('productModal');
@@ -128,6 +150,7 @@ function initializeProducts() {
 
     addProductBtn.addEventListener('click', () => openProductModal());
     bulkDeleteBtn.addEventListener('click', () => handleBulkDelete());
+    exportBtn.addEventListener('click', () => exportProducts());
 
     // Debounced search
     let searchTimeout;
@@ -136,6 +159,7 @@ function initializeProducts() {
         searchTimeout = setTimeout(() => {
             currentSearch = e.target.value;
             currentPage = 1;
+            currentCursor = null;
             loadProducts();
         }, 500);
     });
@@ -143,6 +167,7 @@ function initializeProducts() {
     statusFilter.addEventListener('change', (e) => {
         currentStatus = e.target.value;
         currentPage = 1;
+        currentCursor = null;
         loadProducts();
     });
 
@@ -154,9 +179,29 @@ function initializeProducts() {
     });
 }
 
+function exportProducts() {
+    // The browser downloads the streamed file; the current filters apply
+    let url = `${API_BASE}/products/export?format=csv`;
+
+    if (currentSearch) {
+        url += `&search=${encodeURIComponent(currentSearch)}`;
+    }
+
+    if (currentStatus !== '') {
+        url += `&is_active=${currentStatus}`;
+    }
+
+    window.location.href = url;
+}
+
 async function loadProducts() {
     try {
-        let url = `${API_BASE}/products?page=${currentPage}&per_page=50`;
+        // The pager only needs an approximate total
+        let url = `${API_BASE}/products?page=${currentPage}&per_page=50&count=estimated`;
+
+        if (currentCursor) {
+            url += `&cursor=${encodeURIComponent(currentCursor)}`;
+        }
 
         if (currentSearch) {
             url += `&search=${encodeURIComponent(currentSearch)}`;
@@ -170,7 +215,7 @@ async function loadProducts() {
         const data = await response.json();
 
         renderProducts(data.products);
-        renderPagination(data.page, data.total_pages);
+        renderPagination(currentPage, data.total_pages, data.next_cursor, data.prev_cursor);
     } catch (error) {
         showNotification('Error loading products: ' + error.message, 'error');
     }
@@ -212,7 +257,7 @@ function renderProducts(products) {
     `).join('');
 }
 
-function renderPagination(currentPage, totalPages) {
+function renderPagination(currentPage, totalPages, nextCursor, prevCursor) {
     const pagination = document.getElementById('pagination');
 
     if (totalPages <= 1) {
@@ -222,9 +267,12 @@ function renderPagination(currentPage, totalPages) {
 
     let html = '';
 
-    // Previous button
+    // Previous and Next seek with cursors when the API returns them (not for
+    // searches, which are ordered by relevance); page numbers jump by offset
+    const cursorArg = (cursor) => cursor ? `'${cursor}'` : 'null';
+
     if (currentPage > 1) {
-        html += `<button class="page-btn" onclick="changePage(${currentPage - 1})">← Previous</button>`;
+        html += `<button class="page-btn" onclick="changePage(${currentPage - 1}, ${cursorArg(prevCursor)})">← Previous</button>`;
     }
 
     // Page numbers
@@ -242,15 +290,16 @@ function renderPagination(currentPage, totalPages) {
     }
 
     // Next button
-    if (currentPage < totalPages) {
-        html += `<button class="page-btn" onclick="changePage(${currentPage + 1})">Next →</button>`;
+    if (currentPage < totalPages && (nextCursor || currentSearch)) {
+        html += `<button class="page-btn" onclick="changePage(${currentPage + 1}, ${cursorArg(nextCursor)})">Next →</button>`;
     }
 
     pagination.innerHTML = html;
 }
 
-function changePage(page) {
+function changePage(page, cursor = null) {
     currentPage = page;
+    currentCursor = cursor;
     loadProducts();
 }
 
@@ -408,8 +457,9 @@ async function handleBulkDelete() {
             const data = await response.json();
 
             if (response.ok) {
+                // The delete runs in the background; progress comes over SSE
                 showNotification(data.message, 'success');
-                loadProducts();
+                startProgressTracking(data.task_id);
             } else {
                 showNotification('Error deleting products', 'error');
             }
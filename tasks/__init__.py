@@ -1,4 +1,6 @@
 from tasks.csv_processor import process_csv_file
-from tasks.webhook_sender import send_webhook_notification
+from tasks.sharded_import import import_csv_sharded
+from tasks.product_delete import delete_products
+from tasks.webhook_sender import send_webhook_notification, send_webhook_batch
 
-__all__ = ["process_csv_file", "send_webhook_notification"]
+__all__ = ["process_csv_file", "import_csv_sharded", "delete_products", "send_webhook_notification", "send_webhook_batch"]
@@ -1,174 +1,407 @@
 import pandas as pd
 import os
+import time
+from celery.exceptions import MaxRetriesExceededError, SoftTimeLimitExceeded
 from celery_app import celery_app
+from config import settings
 from database import SessionLocal
 from models import Product
-from utils import ProgressTracker, validate_sku, validate_price, validate_quantity
-from sqlalchemy import func
+from utils import ProgressTracker, ImportCheckpoint, UploadStatus, validate_chunk
+from utils.bulk_loader import (
+    SHARD_STAGING_COLUMNS,
+    upsert_rows,
+    import_staging_table_name,
+    create_import_staging_table,
+    drop_import_staging_table,
+    copy_to_staging,
+    replace_products,
+    flush_gin_pending_lists
+)
+from utils.csv_reader import estimate_row_count, open_chunk_reader
+from utils.chunk_sizer import AdaptiveChunkSizer
+from utils.rejected_rows import (
+    rejected_rows_path,
+    append_rejected_rows,
+    truncate_rejected_rows,
+    remove_expired_rejected_rows
+)
+from utils.sku_dedup import SkuDeduplicator
+from utils.phase_timer import PhaseTimer
+from utils.import_jobs import start_import_job, finish_import_job, job_timer
+from utils.catalog_version import CatalogVersion
+from sqlalchemy import func, text
 from tasks.webhook_sender import send_webhook_notification
 
+# Supported ways of writing a chunk to the database
+LOAD_MODES = ("orm", "copy")
 
-@celery_app.task(bind=True)
-def process_csv_file(self, file_path: str, task_id: str):
+# "upsert" merges the file into the catalog; "replace" makes the file the whole
+# catalog, removing products that are not in it
+IMPORT_MODES = ("upsert", "replace")
+
+# Product columns an import can change
+IMPORT_FIELDS = ("name", "description", "price", "quantity", "is_active")
+
+# How often an import that follows a streaming upload checks for new bytes
+UPLOAD_POLL_SECONDS = 0.25
+
+
+def _upsert_chunk_orm(db, rows: pd.DataFrame, timer: PhaseTimer = None) -> tuple[int, int, int]:
+    """
+    Write one chunk of rows through ORM Product objects
+
+    Args:
+        db: Database session (the caller commits)
+        rows: Clean frame produced by validate_chunk
+        timer: Timer that receives the "fetch" phase
+
+    Returns:
+        tuple: (created_count, updated_count, unchanged_count)
+    """
+    created_count = 0
+    updated_count = 0
+    unchanged_count = 0
+    timer = timer or PhaseTimer()
+
+    # Bulk fetch existing products
+    # Note: We use lower() for case-insensitive comparison
+    with timer.phase("fetch"):
+        existing_products = db.query(Product).filter(
+            func.lower(Product.sku).in_(rows["sku"].str.lower().tolist())
+        ).all()
+
+    existing_map = {p.sku.lower(): p for p in existing_products}
+
+    new_products = []
+
+    for row in rows.to_dict("records"):
+        sku_lower = row["sku"].lower()
+
+        if sku_lower in existing_map:
+            # Update existing, skipping rows that would not change anything
+            product = existing_map[sku_lower]
+            if all(getattr(product, field) == row[field] for field in IMPORT_FIELDS):
+                unchanged_count += 1
+                continue
+            for field in IMPORT_FIELDS:
+                setattr(product, field, row[field])
+            updated_count += 1
+        else:
+            # Create new
+            new_products.append(Product(
+                sku=row["sku"],
+                name=row["name"],
+                description=row["description"],
+                price=row["price"],
+                quantity=row["quantity"],
+                is_active=row["is_active"]
+            ))
+            created_count += 1
+
+    # Bulk insert new products
+    if new_products:
+        db.add_all(new_products)
+        db.flush()  # Get IDs
+
+    return created_count, updated_count, unchanged_count
+
+
+def _upsert_chunk_copy(db, rows: pd.DataFrame, timer: PhaseTimer = None) -> tuple[int, int, int]:
+    """
+    Write one chunk of rows via COPY into staging + INSERT ... ON CONFLICT
+
+    The lookup of existing rows happens inside the upsert statement, so this
+    path has no separate "fetch" phase.
+
+    Args:
+        db: Database session (the caller commits)
+        rows: Clean frame produced by validate_chunk
+        timer: Unused; accepted for the common upsert signature
+
+    Returns:
+        tuple: (created_count, updated_count, unchanged_count)
+    """
+    return upsert_rows(db, rows)
+
+
+@celery_app.task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=5)
+def process_csv_file(
+    self,
+    file_path: str,
+    task_id: str,
+    load_mode: str = None,
+    follow_upload: bool = False,
+    import_mode: str = "upsert"
+):
     """
     Process CSV file and import products into database
+
+    Parquet and Arrow IPC files go through the same validation and upsert
+    path; they are read batch by batch with only the product columns.
+
+    A checkpoint is stored after every committed chunk. When the task is
+    redelivered after a worker crash, retried after the soft time limit, or
+    resumed through the API, it continues from the last checkpoint instead of
+    row zero.
+
+    With follow_upload the task starts while the file is still being streamed
+    in: it imports every complete record as soon as it is on disk and waits for
+    more until UploadStatus reports the upload complete.
+
+    In replace mode chunks are only staged (load_mode does not apply). Once the
+    file is read, the staged rows become the new products table through a
+    shadow table swap (see replace_products), and the result also counts the
+    removed products.
     
     Args:
-        file_path: Path to the CSV file
+        file_path: Path to the CSV, Parquet or Arrow IPC file
         task_id: Unique task identifier for progress tracking
+        load_mode: "copy" (COPY + set-based upsert) or "orm"; defaults to settings.IMPORT_LOAD_MODE
+        follow_upload: The file is still being written by a streaming upload
+        import_mode: "upsert" (default) or "replace"
     """
     db = SessionLocal()
     tracker = ProgressTracker()
+    load_mode = load_mode or settings.IMPORT_LOAD_MODE
+    upsert_chunk = _upsert_chunk_copy if load_mode == "copy" else _upsert_chunk_orm
+    replace = import_mode == "replace"
+    staging_table = import_staging_table_name(task_id)
+    job = None
+    timer = None
+    processed = 0
+    counts = {"created": 0, "updated": 0, "unchanged": 0, "errors": 0, "duplicates": 0}
+    if replace:
+        counts["removed"] = 0
+
+    def fail(error_msg: str, abandon: bool = False) -> dict:
+        """
+        Report a failed import in progress and in the job history
+
+        An abandoned import cannot be resumed, so its checkpoint, staging table
+        and uploaded file are removed as well.
+        """
+        tracker.set_error(task_id, error_msg)
+        if abandon:
+            ImportCheckpoint.clear(task_id)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            if replace:
+                try:
+                    db.rollback()
+                    drop_import_staging_table(db, staging_table)
+                    db.commit()
+                except Exception as e:
+                    print(f"Could not drop staging table of import {task_id}: {e}")
+        if job is not None:
+            try:
+                db.rollback()
+                finish_import_job(db, job, "error", counts, processed, timer, error_msg)
+            except Exception as e:
+                print(f"Could not record failed import {task_id}: {e}")
+        return {"status": "error", "message": error_msg}
     
     try:
+        if load_mode not in LOAD_MODES:
+            return fail(f"Unknown load mode: {load_mode}")
+        if import_mode not in IMPORT_MODES:
+            return fail(f"Unknown import mode: {import_mode}")
+
         # Update initial status
         tracker.set_progress(task_id, 0, "Reading CSV file...", 100)
+        job = start_import_job(db, task_id, file_path, load_mode, self.request.hostname, import_mode)
+        timer = job_timer(job)
         
-        # Process in chunks using pandas chunksize iterator
-        chunk_size = 1000
-        processed = 0
-        created_count = 0
-        updated_count = 0
-        error_count = 0
-        
-        # Get total rows for progress tracking (approximate or separate count)
-        # Note: Counting rows in a large file can be slow, but needed for progress bar.
-        # We'll use a generator to count lines efficiently without loading file.
-        with open(file_path, 'rb') as f:
-            total_rows = sum(1 for _ in f) - 1 # Subtract header
-            
-        if total_rows <= 0:
-             tracker.set_error(task_id, "CSV file is empty")
-             return {"status": "error", "message": "CSV file is empty"}
-
-        tracker.set_progress(task_id, 0, f"Processing {total_rows} products...", total_rows)
-        
-        # Iterate over chunks directly from read_csv
-        for chunk in pd.read_csv(file_path, chunksize=chunk_size):
-            # Normalize column names for this chunk
-            chunk.columns = chunk.columns.str.lower().str.strip()
-            
-            # Validate required columns (only need to check first chunk really, but safe to check all)
+        # Process in chunks read straight from the file; the chunk size adapts
+        # to the measured chunk duration and worker memory
+        sizer = AdaptiveChunkSizer()
+        # SKUs repeated in the file: last row wins (seen SKUs are not checkpointed,
+        # so a resumed import only counts repeats from the resume point on)
+        deduplicator = SkuDeduplicator()
+        start_offset = None
+        rejected_path = rejected_rows_path(task_id)
+        rejected_bytes = 0
+
+        # Continue from the last committed chunk of an earlier attempt
+        checkpoint = ImportCheckpoint.get(task_id)
+        if checkpoint and checkpoint["file_path"] == file_path:
+            start_offset = checkpoint["offset"]
+            processed = checkpoint["rows"]
+            counts.update(checkpoint["counts"])
+            rejected_bytes = checkpoint.get("rejected_bytes", 0)
+
+        # Rejected rows written after the checkpoint are written again
+        truncate_rejected_rows(rejected_path, rejected_bytes)
+
+        # Progress is measured in bytes consumed, so the file is read only once.
+        # The row total shown to users is an estimate from a sample of rows.
+        total_bytes = os.path.getsize(file_path)
+        upload = UploadStatus.get(task_id) if follow_upload else None
+        if upload and upload.get("expected_bytes"):
+            total_bytes = max(total_bytes, upload["expected_bytes"])
+        with timer.phase("parse"):
+            estimated_rows = estimate_row_count(file_path, file_size=total_bytes)
+
+        with open_chunk_reader(file_path, start_offset, follow=follow_upload) as reader:
+            if not reader.has_data:
+                return fail("CSV file is empty")
+
+            # Validate required columns
             required_columns = {'sku', 'name', 'price'}
-            if not required_columns.issubset(set(chunk.columns)):
-                missing = required_columns - set(chunk.columns)
-                error_msg = f"Missing required columns: {', '.join(missing)}"
-                tracker.set_error(task_id, error_msg)
-                return {"status": "error", "message": error_msg}
-
-            # 1. Collect SKUs in this chunk
-            chunk_skus = []
-            sku_to_row = {}
-            
-            for idx, row in chunk.iterrows():
-                sku = str(row.get('sku', '')).strip()
-                if validate_sku(sku):
-                    chunk_skus.append(sku)
-                    sku_to_row[sku.lower()] = row
-                else:
-                    error_count += 1
-            
-            if not chunk_skus:
-                processed += len(chunk)
-                continue
-                
-            # 2. Bulk fetch existing products
-            # Note: We use lower() for case-insensitive comparison
-            existing_products = db.query(Product).filter(
-                func.lower(Product.sku).in_([s.lower() for s in chunk_skus])
-            ).all()
-            
-            existing_map = {p.sku.lower(): p for p in existing_products}
-            
-            # 3. Process rows
-            new_products = []
-            
-            for sku_raw in chunk_skus:
-                sku_lower = sku_raw.lower()
-                row = sku_to_row[sku_lower]
-                
-                try:
-                    # Extract data
-                    name = str(row.get('name', '')).strip()
-                    description = str(row.get('description', '')).strip() if 'description' in row else ''
-                    price = float(row.get('price', 0))
-                    quantity = int(row.get('quantity', 0)) if 'quantity' in row else 0
-                    is_active = bool(row.get('is_active', True)) if 'is_active' in row else True
-                    
-                    # Validate
-                    if not name or not validate_price(price) or not validate_quantity(quantity):
-                        error_count += 1
+            if not required_columns.issubset(set(reader.columns)):
+                missing = required_columns - set(reader.columns)
+                return fail(f"Missing required columns: {', '.join(missing)}")
+
+            if processed:
+                status = f"Resuming at row {processed} of ~{estimated_rows}..."
+            else:
+                status = f"Processing ~{estimated_rows} products..."
+            tracker.set_byte_progress(task_id, reader.raw_offset, total_bytes, processed, status, estimated_rows)
+
+            if replace:
+                # Replace imports stage the whole file first. The shard column
+                # holds the first row of each chunk, so chunks staged after the
+                # checkpoint can be dropped and staged again.
+                create_import_staging_table(db, staging_table)
+                db.execute(text(f"DELETE FROM {staging_table} WHERE shard >= :rows"), {"rows": processed})
+                db.commit()
+            ImportCheckpoint.save(
+                task_id, file_path, load_mode, reader.offset, processed, counts, rejected_bytes, import_mode
+            )
+
+            # Cells are read as raw strings; validate_chunk does all type conversion
+            while True:
+                chunk_started = time.perf_counter()
+                with timer.phase("parse"):
+                    chunk = reader.read_chunk(sizer.size)
+                if chunk is None:
+                    if not reader.follow:
+                        break
+
+                    # Caught up with a streaming upload: wait for more bytes
+                    upload = UploadStatus.get(task_id)
+                    if upload is None or upload["state"] == "failed":
+                        reason = upload.get("error") if upload else "upload status expired"
+                        reader.close()
+                        return fail(f"Upload was interrupted after {processed} rows: {reason}", abandon=True)
+                    if upload["state"] == "complete":
+                        # Read the rest, including a last record without trailing newline
+                        reader.follow = False
+                        total_bytes = upload["bytes_received"]
                         continue
-                    
-                    if sku_lower in existing_map:
-                        # Update existing
-                        product = existing_map[sku_lower]
-                        product.name = name
-                        product.description = description
-                        product.price = price
-                        product.quantity = quantity
-                        product.is_active = is_active
-                        updated_count += 1
-                    else:
-                        # Create new
-                        new_product = Product(
-                            sku=sku_raw, # Use original case
-                            name=name,
-                            description=description,
-                            price=price,
-                            quantity=quantity,
-                            is_active=is_active
-                        )
-                        new_products.append(new_product)
-                        created_count += 1
-                
-                except Exception as e:
-                    error_count += 1
-                    print(f"Error processing row: {str(e)}")
+                    time.sleep(UPLOAD_POLL_SECONDS)
                     continue
-            
-            # 4. Bulk insert new products
-            if new_products:
-                db.add_all(new_products)
-                db.flush() # Get IDs
-            
-            processed += len(chunk)
-            
-            # Commit chunk
-            db.commit()
-            
-            # Update progress
-            percentage = int((processed / total_rows) * 100)
-            tracker.set_progress(
-                task_id,
-                processed,
-                f"Processed {processed}/{total_rows} products...",
-                total_rows
-            )
+
+                chunk_changed = False
+                with timer.phase("validate"):
+                    rows, rejected = validate_chunk(chunk, processed + 1)
+                    counts["errors"] += len(rejected)
+                    rows, chunk_duplicates = deduplicator.dedupe(rows)
+                    counts["duplicates"] += chunk_duplicates
+
+                if replace:
+                    rows.insert(0, "shard", processed)
+                    with timer.phase("upsert"):
+                        copy_to_staging(db, rows, staging_table, SHARD_STAGING_COLUMNS)
+                elif not rows.empty:
+                    with timer.phase("upsert"):
+                        chunk_created, chunk_updated, chunk_unchanged = upsert_chunk(db, rows, timer)
+                    counts["created"] += chunk_created
+                    counts["updated"] += chunk_updated
+                    counts["unchanged"] += chunk_unchanged
+                    chunk_changed = chunk_created + chunk_updated > 0
+
+                processed += len(chunk)
+
+                # Commit chunk, then record how far we got
+                with timer.phase("commit"):
+                    db.commit()
+                if chunk_changed:
+                    CatalogVersion.bump()
+                sizer.record(len(chunk), time.perf_counter() - chunk_started)
+                rejected_bytes = append_rejected_rows(rejected_path, rejected)
+                ImportCheckpoint.save(
+                    task_id, file_path, load_mode, reader.offset, processed, counts, rejected_bytes, import_mode
+                )
+
+                # Update progress
+                tracker.set_byte_progress(
+                    task_id,
+                    reader.raw_offset,
+                    total_bytes,
+                    processed,
+                    f"Processed {processed}/~{estimated_rows} products...",
+                    estimated_rows
+                )
         
+        if replace:
+            tracker.set_byte_progress(
+                task_id, total_bytes, total_bytes, processed, "Replacing the catalog...", processed
+            )
+            with timer.phase("upsert"):
+                try:
+                    counts["created"], counts["updated"], counts["unchanged"], counts["removed"] = replace_products(
+                        db, staging_table, order_by="shard DESC, row_num DESC"
+                    )
+                except Exception as e:
+                    # The whole file is staged; resuming would only repeat the swap
+                    return fail(f"Error replacing the catalog: {str(e)}", abandon=True)
+                drop_import_staging_table(db, staging_table)
+
         # Final commit
-        db.commit()
+        with timer.phase("commit"):
+            db.commit()
+        if replace:
+            CatalogVersion.bump()
+        else:
+            # The swap builds fresh search indexes; upserts leave pending entries
+            with timer.phase("commit"):
+                flush_gin_pending_lists(db)
+        ImportCheckpoint.clear(task_id)
         
         # Clean up file
         if os.path.exists(file_path):
             os.remove(file_path)
         
         # Set completion status
-        message = f"Import complete! Created: {created_count}, Updated: {updated_count}, Errors: {error_count}"
-        tracker.set_complete(task_id, message)
+        message = (
+            f"Import complete! Created: {counts['created']}, Updated: {counts['updated']}, "
+            f"Unchanged: {counts['unchanged']}, Errors: {counts['errors']}, "
+            f"Duplicate SKUs: {counts['duplicates']}"
+        )
+        if replace:
+            message += f", Removed: {counts['removed']}"
+        rejected_url = f"/api/upload/{task_id}/rejected" if counts["errors"] else None
+        tracker.set_complete(task_id, message, rejected_url)
+        finish_import_job(db, job, "complete", counts, processed, timer)
+        remove_expired_rejected_rows()
         
         return {
             "status": "complete",
-            "created": created_count,
-            "updated": updated_count,
-            "errors": error_count,
-            "total": total_rows
+            **counts,
+            "total": processed,
+            "load_mode": load_mode,
+            "import_mode": import_mode,
+            "rejected_url": rejected_url,
+            "import_job_id": job.id,
+            "phases": timer.summary(),
+            "chunking": sizer.summary()
         }
+
+    except SoftTimeLimitExceeded:
+        # Hand over to a fresh attempt before the hard limit kills the worker;
+        # it picks up from the last checkpoint.
+        db.rollback()
+        print(f"Soft time limit reached for import {task_id}, resuming from checkpoint")
+        try:
+            raise self.retry(countdown=0)
+        except MaxRetriesExceededError:
+            return fail(
+                f"Import exceeded its time limit after {processed} rows; "
+                "resume it to continue from the last checkpoint"
+            )
     
     except Exception as e:
-        error_msg = f"Error processing CSV: {str(e)}"
-        tracker.set_error(task_id, error_msg)
-        return {"status": "error", "message": error_msg}
+        return fail(f"Error processing CSV: {str(e)}")
     
     finally:
         db.close()
@@ -0,0 +1,128 @@
+from typing import Optional
+from celery.exceptions import MaxRetriesExceededError, SoftTimeLimitExceeded
+from celery_app import celery_app
+from config import settings
+from database import SessionLocal
+from models import Product
+from utils import ProgressTracker
+from utils.bulk_loader import truncate_products
+from utils.catalog_version import CatalogVersion
+from utils.product_search import search_filter
+from sqlalchemy import delete, func, select
+from tasks.webhook_sender import send_webhook_notification
+
+
+def _product_filters(search: Optional[str], is_active: Optional[bool]) -> list:
+    """Build the WHERE clauses of a filtered delete, as for GET /products"""
+    filters = []
+    if search:
+        filters.append(search_filter(search))
+    if is_active is not None:
+        filters.append(Product.is_active == is_active)
+    return filters
+
+
+def _delete_in_batches(db, task_id: str, filters: list, counts: dict):
+    """
+    Delete the matching products one id range at a time
+
+    Every range of PRODUCT_DELETE_BATCH_IDS ids is deleted and committed on
+    its own, so locks and WAL stay bounded and readers see the catalog shrink
+    as the job goes. A retried job starts again at the lowest matching id.
+
+    Args:
+        db: Database session (committed per batch)
+        task_id: Unique task identifier for progress tracking
+        filters: WHERE clauses selecting the products to delete
+        counts: Holds "deleted", updated after every committed batch
+    """
+    tracker = ProgressTracker()
+    first_id, last_id = db.execute(select(func.min(Product.id), func.max(Product.id)).where(*filters)).one()
+    if first_id is None:
+        return
+
+    total_ids = last_id - first_id + 1
+    for low in range(first_id, last_id + 1, settings.PRODUCT_DELETE_BATCH_IDS):
+        high = low + settings.PRODUCT_DELETE_BATCH_IDS
+        result = db.execute(
+            delete(Product)
+            .where(Product.id >= low, Product.id < high, *filters)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        counts["deleted"] += result.rowcount
+        if result.rowcount:
+            CatalogVersion.bump()
+        tracker.set_progress(
+            task_id, min(high, last_id + 1) - first_id, f"Deleted {counts['deleted']} products...", total_ids
+        )
+
+
+@celery_app.task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=5)
+def delete_products(
+    self,
+    task_id: str,
+    search: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    deleted_before: int = 0
+):
+    """
+    Delete all products, or those matching the filters of GET /products
+
+    Without filters the table is emptied with TRUNCATE (see truncate_products).
+    With filters the matching rows are deleted in committed id-range batches,
+    so the job can stop and be retried at any point without losing work.
+    When it finishes, one product.bulk_deleted webhook carries the count.
+
+    Args:
+        task_id: Unique task identifier for progress tracking
+        search: Search term, as for GET /products
+        is_active: Delete only active or only inactive products
+        deleted_before: Products deleted by earlier attempts of this job
+    """
+    db = SessionLocal()
+    tracker = ProgressTracker()
+    counts = {"deleted": deleted_before}
+    filters = _product_filters(search, is_active)
+
+    try:
+        if filters:
+            tracker.set_progress(task_id, 0, "Deleting products...", 100)
+            _delete_in_batches(db, task_id, filters, counts)
+        else:
+            tracker.set_progress(task_id, 0, "Deleting all products...", 100)
+            counts["deleted"] += truncate_products(db)
+            db.commit()
+            CatalogVersion.bump()
+
+        deleted = counts["deleted"]
+        tracker.set_complete(task_id, f"Deleted {deleted} products successfully")
+        send_webhook_notification.delay(
+            "product.bulk_deleted",
+            {"count": deleted, "search": search, "is_active": is_active}
+        )
+
+        return {"status": "complete", "deleted": deleted}
+
+    except SoftTimeLimitExceeded:
+        # Committed batches stay deleted; a fresh attempt continues with the rest
+        db.rollback()
+        print(f"Soft time limit reached for delete {task_id}, continuing in a new attempt")
+        try:
+            raise self.retry(
+                countdown=0,
+                kwargs={"search": search, "is_active": is_active, "deleted_before": counts["deleted"]}
+            )
+        except MaxRetriesExceededError:
+            error_msg = f"Delete exceeded its time limit after {counts['deleted']} products"
+            tracker.set_error(task_id, error_msg)
+            return {"status": "error", "message": error_msg}
+
+    except Exception as e:
+        db.rollback()
+        error_msg = f"Error deleting products: {str(e)}"
+        tracker.set_error(task_id, error_msg)
+        return {"status": "error", "message": error_msg}
+
+    finally:
+        db.close()
@@ -0,0 +1,513 @@
+import os
+from celery import chord, group
+from celery_app import celery_app
+from config import settings
+from database import SessionLocal
+from utils import ProgressTracker, validate_chunk
+from utils.bulk_loader import (
+    SHARD_STAGING_COLUMNS,
+    import_staging_table_name,
+    create_import_staging_table,
+    drop_import_staging_table,
+    copy_to_staging,
+    merge_staging,
+    replace_products,
+    flush_gin_pending_lists
+)
+from utils.csv_reader import CsvChunkReader, estimate_row_count, read_csv_header, split_byte_ranges
+from utils.phase_timer import PhaseTimer
+from utils.import_jobs import start_import_job, finish_import_job
+from utils.catalog_version import CatalogVersion
+from models import ImportJob
+from utils.rejected_rows import (
+    rejected_rows_path,
+    append_rejected_rows,
+    truncate_rejected_rows,
+    merge_rejected_parts,
+    remove_expired_rejected_rows
+)
+from sqlalchemy import text
+
+# Rows parsed and copied to the staging table per shard commit
+SHARD_CHUNK_SIZE = 10000
+
+# Order of staged rows in which the first row of a SKU wins: later shard, then later row
+STAGED_ORDER = "shard DESC, row_num DESC"
+
+
+def _fail_sharded_import(
+    db,
+    file_path: str,
+    task_id: str,
+    shard_count: int,
+    error_msg: str,
+    timer: PhaseTimer = None
+) -> dict:
+    """
+    Clean up after a failed sharded import and report the error
+
+    Drops the staging table, the per-shard rejected-rows parts and the
+    uploaded file (a sharded import cannot be resumed), then records the
+    error in progress and in the job history.
+
+    Args:
+        db: Database session
+        file_path: Path to the CSV file
+        task_id: Unique task identifier for progress tracking
+        shard_count: Number of shards the import was split into
+        error_msg: Error description
+        timer: Phase timings gathered so far
+
+    Returns:
+        dict: Error result of the task
+    """
+    tracker = ProgressTracker()
+    tracker.set_error(task_id, error_msg)
+    try:
+        db.rollback()
+        drop_import_staging_table(db, import_staging_table_name(task_id))
+        db.commit()
+        for shard in range(shard_count):
+            truncate_rejected_rows(rejected_rows_path(task_id, shard), 0)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        job = db.query(ImportJob).filter(ImportJob.task_id == task_id).first()
+        if job is not None:
+            finish_import_job(db, job, "error", timer=timer, error_message=error_msg)
+    except Exception as e:
+        print(f"Could not clean up failed import {task_id}: {e}")
+    return {"status": "error", "message": error_msg}
+
+
+@celery_app.task(bind=True)
+def import_csv_sharded(self, file_path: str, task_id: str, shard_count: int = None, import_mode: str = "upsert"):
+    """
+    Split a CSV file into byte-range shards and import them in parallel
+
+    Every shard parses, validates and COPYs its slice into one import-wide
+    staging table. Once all are staged, the table is merged into products by
+    parallel tasks that each take a disjoint set of SKUs (see
+    finalize_sharded_import). A SKU repeated across shards therefore resolves
+    to the row that comes last in the file, no matter which shard finished
+    first. In replace mode the staged rows replace the whole catalog instead.
+
+    Args:
+        file_path: Path to the CSV file
+        task_id: Unique task identifier for progress tracking
+        shard_count: Number of shards; defaults to settings.IMPORT_SHARD_COUNT
+        import_mode: "upsert" or "replace"
+    """
+    db = SessionLocal()
+    tracker = ProgressTracker()
+    shard_count = shard_count or settings.IMPORT_SHARD_COUNT
+
+    try:
+        required_columns = {'sku', 'name', 'price'}
+        missing = required_columns - set(read_csv_header(file_path))
+        if missing:
+            error_msg = f"Missing required columns: {', '.join(missing)}"
+            tracker.set_error(task_id, error_msg)
+            return {"status": "error", "message": error_msg}
+
+        ranges = split_byte_ranges(file_path, shard_count)
+        if not ranges:
+            tracker.set_error(task_id, "CSV file is empty")
+            return {"status": "error", "message": "CSV file is empty"}
+
+        create_import_staging_table(db, import_staging_table_name(task_id))
+        db.commit()
+        start_import_job(db, task_id, file_path, "sharded", self.request.hostname, import_mode)
+
+        # Progress is shared by all shards and measured in bytes of the data section
+        total_bytes = ranges[-1][1] - ranges[0][0]
+        estimated_rows = estimate_row_count(file_path)
+        tracker.set_byte_progress(
+            task_id, 0, total_bytes, 0, f"Importing ~{estimated_rows} products in {len(ranges)} shards...", estimated_rows
+        )
+
+        shards = group(
+            process_csv_shard.s(file_path, task_id, shard, start_offset, end_offset, total_bytes, estimated_rows)
+            for shard, (start_offset, end_offset) in enumerate(ranges)
+        )
+        # A shard that never reports back (e.g. its worker was lost for good)
+        # fails the chord; the callback then never runs, so clean up there
+        on_error = abort_sharded_import.s(file_path=file_path, task_id=task_id, shard_count=len(ranges))
+        chord(shards)(finalize_sharded_import.s(file_path, task_id, import_mode).on_error(on_error))
+
+        return {"status": "dispatched", "shards": len(ranges)}
+
+    except Exception as e:
+        return _fail_sharded_import(db, file_path, task_id, 0, f"Error processing CSV: {str(e)}")
+
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def process_csv_shard(
+    self,
+    file_path: str,
+    task_id: str,
+    shard: int,
+    start_offset: int,
+    end_offset: int,
+    total_bytes: int,
+    estimated_rows: int = None
+):
+    """
+    Parse, validate and stage one byte range of a CSV file
+
+    The shard's staged rows and rejected-rows part are deleted before it
+    starts, so a redelivery after a worker crash restages the range instead
+    of duplicating it.
+
+    Args:
+        file_path: Path to the CSV file
+        task_id: Unique task identifier for progress tracking
+        shard: Shard index (higher index = later in the file)
+        start_offset: First byte of the range (start of a line)
+        end_offset: Byte offset where the range ends
+        total_bytes: Size of the whole data section, for progress
+        estimated_rows: Row estimate for the whole file, for progress
+    """
+    db = SessionLocal()
+    tracker = ProgressTracker()
+    staging_table = import_staging_table_name(task_id)
+    rejected_path = rejected_rows_path(task_id, shard)
+    staged = 0
+    error_count = 0
+    rows_read = 0
+    timer = PhaseTimer()
+
+    try:
+        # Drop rows left behind by an earlier attempt of this shard
+        db.execute(text(f"DELETE FROM {staging_table} WHERE shard = :shard"), {"shard": shard})
+        truncate_rejected_rows(rejected_path, 0)
+
+        with CsvChunkReader(file_path, start_offset, end_offset) as reader:
+            chunk_start = reader.offset
+
+            while True:
+                with timer.phase("parse"):
+                    chunk = reader.read_chunk(SHARD_CHUNK_SIZE)
+                if chunk is None:
+                    break
+
+                # row_num is relative to the shard; (shard, row_num) orders the whole file
+                with timer.phase("validate"):
+                    rows, rejected = validate_chunk(chunk, reader.rows_read - len(chunk) + 1)
+                error_count += len(rejected)
+
+                rows.insert(0, "shard", shard)
+                with timer.phase("upsert"):
+                    staged += copy_to_staging(db, rows, staging_table, SHARD_STAGING_COLUMNS)
+                with timer.phase("commit"):
+                    db.commit()
+                append_rejected_rows(rejected_path, rejected)
+
+                tracker.increment_byte_progress(
+                    task_id,
+                    reader.offset - chunk_start,
+                    len(chunk),
+                    total_bytes,
+                    f"Importing ~{estimated_rows} products in shards...",
+                    estimated_rows
+                )
+                chunk_start = reader.offset
+
+            rows_read = reader.rows_read
+
+        return {
+            "status": "complete",
+            "shard": shard,
+            "bytes": end_offset - start_offset,
+            "rows": rows_read,
+            "staged": staged,
+            "errors": error_count,
+            "phases": timer.seconds
+        }
+
+    except Exception as e:
+        return {"status": "error", "shard": shard, "message": str(e)}
+
+    finally:
+        db.close()
+
+
+def _complete_sharded_import(
+    db,
+    job: ImportJob,
+    file_path: str,
+    task_id: str,
+    counts: dict,
+    summary: dict,
+    timer: PhaseTimer
+) -> dict:
+    """
+    Report a finished sharded import in progress and in the job history
+
+    Args:
+        db: Database session
+        job: Job of the import, if recorded
+        file_path: Path to the CSV file (removed here)
+        task_id: Unique task identifier for progress tracking
+        counts: created, updated, unchanged and removed (None outside replace mode)
+        summary: rows, errors, duplicates and shards gathered from the shards
+        timer: Phase timings summed over all workers
+
+    Returns:
+        dict: Result of the task
+    """
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+    message = (
+        f"Import complete! Created: {counts['created']}, Updated: {counts['updated']}, "
+        f"Unchanged: {counts['unchanged']}, Errors: {summary['errors']}, Duplicate SKUs: {summary['duplicates']}"
+    )
+    if counts["removed"] is not None:
+        message += f", Removed: {counts['removed']}"
+    rejected_url = f"/api/upload/{task_id}/rejected" if summary["errors"] else None
+    ProgressTracker().set_complete(task_id, message, rejected_url)
+
+    if job is not None:
+        wall_seconds = db.execute(
+            text("SELECT extract(epoch FROM now() - started_at) FROM import_jobs WHERE id = :id"),
+            {"id": job.id}
+        ).scalar()
+        job_counts = {
+            **counts,
+            "errors": summary["errors"],
+            "duplicates": summary["duplicates"],
+            "removed": counts["removed"] or 0
+        }
+        finish_import_job(
+            db, job, "complete", job_counts, summary["rows"], timer, total_seconds=float(wall_seconds)
+        )
+
+    remove_expired_rejected_rows()
+
+    return {
+        "status": "complete",
+        **counts,
+        "errors": summary["errors"],
+        "duplicates": summary["duplicates"],
+        "total": summary["rows"],
+        "rejected_url": rejected_url,
+        "import_job_id": job.id if job is not None else None,
+        "phases": timer.summary(),
+        "shards": summary["shards"]
+    }
+
+
+@celery_app.task(bind=True)
+def finalize_sharded_import(self, shard_results: list, file_path: str, task_id: str, import_mode: str = "upsert"):
+    """
+    Chord callback: merge all staged shards into products
+
+    In upsert mode the staged rows are merged by one merge_staging_partition
+    task per shard, each taking a disjoint set of SKUs, and finish_sharded_merge
+    finishes the import. In replace mode the staged rows become the whole
+    catalog in a single shadow table swap, which has to run in one
+    transaction, so that merge stays serial.
+
+    Args:
+        shard_results: Return values of process_csv_shard
+        file_path: Path to the CSV file
+        task_id: Unique task identifier for progress tracking
+        import_mode: "upsert" merges the staged rows, "replace" swaps them in as the whole catalog
+    """
+    db = SessionLocal()
+    tracker = ProgressTracker()
+    staging_table = import_staging_table_name(task_id)
+    shard_count = len(shard_results)
+    job = db.query(ImportJob).filter(ImportJob.task_id == task_id).first()
+
+    # Shards ran in parallel: phase times are summed over workers, while
+    # total_seconds is the wall time since the import was dispatched
+    timer = PhaseTimer()
+    for result in shard_results:
+        for phase, seconds in result.get("phases", {}).items():
+            timer.add(phase, seconds)
+
+    try:
+        failed = [r for r in shard_results if r.get("status") != "complete"]
+        if failed:
+            error_msg = f"Error processing CSV shard {failed[0]['shard']}: {failed[0].get('message')}"
+            return _fail_sharded_import(db, file_path, task_id, shard_count, error_msg, timer)
+
+        total_bytes = sum(r["bytes"] for r in shard_results)
+        total_rows = sum(r["rows"] for r in shard_results)
+
+        # Shard parts hold shard-relative line numbers; shift each by the rows
+        # of the shards before it (a re-imported sidecar already has absolute ones)
+        absolute_lines = "line_number" in read_csv_header(file_path)
+        parts = []
+        rows_before = 0
+        for result in sorted(shard_results, key=lambda r: r["shard"]):
+            parts.append((rejected_rows_path(task_id, result["shard"]), 0 if absolute_lines else rows_before))
+            rows_before += result["rows"]
+        merge_rejected_parts(rejected_rows_path(task_id), parts)
+
+        tracker.set_byte_progress(
+            task_id, total_bytes, total_bytes, total_rows, "Merging shards into products...", total_rows
+        )
+
+        # Later shard, then later row, wins for SKUs staged more than once
+        duplicate_count = db.execute(
+            text(f"SELECT count(*) - count(DISTINCT lower(sku)) FROM {staging_table}")
+        ).scalar()
+        summary = {
+            "rows": total_rows,
+            "errors": sum(r["errors"] for r in shard_results),
+            "duplicates": duplicate_count,
+            "shards": shard_count
+        }
+
+        if import_mode == "replace":
+            with timer.phase("upsert"):
+                created_count, updated_count, unchanged_count, removed_count = replace_products(
+                    db, staging_table, order_by=STAGED_ORDER
+                )
+                drop_import_staging_table(db, staging_table)
+            with timer.phase("commit"):
+                db.commit()
+            CatalogVersion.bump()
+            counts = {
+                "created": created_count,
+                "updated": updated_count,
+                "unchanged": unchanged_count,
+                "removed": removed_count
+            }
+            return _complete_sharded_import(db, job, file_path, task_id, counts, summary, timer)
+
+        # End this transaction first: it must not hold the staging table while the merge runs
+        db.commit()
+        merges = group(
+            merge_staging_partition.s(task_id, partition, shard_count)
+            for partition in range(shard_count)
+        )
+        on_error = abort_sharded_import.s(file_path=file_path, task_id=task_id, shard_count=shard_count)
+        chord(merges)(finish_sharded_merge.s(file_path, task_id, summary, timer.seconds).on_error(on_error))
+
+        return {"status": "merging", "partitions": shard_count}
+
+    except Exception as e:
+        return _fail_sharded_import(db, file_path, task_id, shard_count, f"Error processing CSV: {str(e)}", timer)
+
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def merge_staging_partition(self, task_id: str, partition: int, partitions: int):
+    """
+    Merge one SKU hash partition of a sharded import's staged rows into products
+
+    Partitions hold disjoint SKUs, so they are merged in parallel without
+    conflicting, and the later shard and row still wins for a SKU staged more
+    than once. Merging is idempotent: a redelivered partition finds its rows
+    already unchanged.
+
+    Args:
+        task_id: Unique task identifier of the import
+        partition: Partition index
+        partitions: Number of partitions
+    """
+    db = SessionLocal()
+    timer = PhaseTimer()
+
+    try:
+        with timer.phase("upsert"):
+            created_count, updated_count, unchanged_count = merge_staging(
+                db, import_staging_table_name(task_id), order_by=STAGED_ORDER, partition=(partition, partitions)
+            )
+        with timer.phase("commit"):
+            db.commit()
+        CatalogVersion.bump()
+
+        return {
+            "status": "complete",
+            "partition": partition,
+            "created": created_count,
+            "updated": updated_count,
+            "unchanged": unchanged_count,
+            "phases": timer.seconds
+        }
+
+    except Exception as e:
+        db.rollback()
+        return {"status": "error", "partition": partition, "message": str(e)}
+
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True)
+def finish_sharded_merge(self, merge_results: list, file_path: str, task_id: str, summary: dict, phases: dict):
+    """
+    Chord callback: finish a sharded upsert once every partition is merged
+
+    Args:
+        merge_results: Return values of merge_staging_partition
+        file_path: Path to the CSV file
+        task_id: Unique task identifier for progress tracking
+        summary: rows, errors, duplicates and shards from finalize_sharded_import
+        phases: Phase timings of the shards
+    """
+    db = SessionLocal()
+    job = db.query(ImportJob).filter(ImportJob.task_id == task_id).first()
+    timer = PhaseTimer(phases)
+    for result in merge_results:
+        for phase, seconds in result.get("phases", {}).items():
+            timer.add(phase, seconds)
+
+    try:
+        failed = [r for r in merge_results if r.get("status") != "complete"]
+        if failed:
+            # Other partitions are committed; re-importing the file completes the rest
+            error_msg = (
+                f"Error merging products (partition {failed[0]['partition']}): {failed[0].get('message')}"
+            )
+            return _fail_sharded_import(db, file_path, task_id, summary["shards"], error_msg, timer)
+
+        drop_import_staging_table(db, import_staging_table_name(task_id))
+        with timer.phase("commit"):
+            db.commit()
+            flush_gin_pending_lists(db)
+        CatalogVersion.bump()
+
+        counts = {
+            "created": sum(r["created"] for r in merge_results),
+            "updated": sum(r["updated"] for r in merge_results),
+            "unchanged": sum(r["unchanged"] for r in merge_results),
+            "removed": None
+        }
+        return _complete_sharded_import(db, job, file_path, task_id, counts, summary, timer)
+
+    except Exception as e:
+        error_msg = f"Error processing CSV: {str(e)}"
+        return _fail_sharded_import(db, file_path, task_id, summary["shards"], error_msg, timer)
+
+    finally:
+        db.close()
+
+
+@celery_app.task
+def abort_sharded_import(request, exc, traceback, file_path: str, task_id: str, shard_count: int):
+    """
+    Error callback of the shard and merge chords: clean up when one of their tasks failed
+
+    Args:
+        request: Request of the failed task
+        exc: Exception it failed with
+        traceback: Its traceback
+        file_path: Path to the CSV file
+        task_id: Unique task identifier for progress tracking
+        shard_count: Number of shards the import was split into
+    """
+    db = SessionLocal()
+    try:
+        return _fail_sharded_import(db, file_path, task_id, shard_count, f"Error processing CSV: {exc!r}")
+    finally:
+        db.close()
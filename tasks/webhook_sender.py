@@ -1,10 +1,53 @@
 import requests
+import time
+from celery.exceptions import SoftTimeLimitExceeded
 from celery_app import celery_app
+from config import settings
 from database import SessionLocal
 from models import Webhook
 from datetime import datetime
 
 
+def _post_webhook(http, webhook: Webhook, event_type: str, data: dict):
+    """
+    POST one event to a webhook endpoint
+
+    Args:
+        http: requests module or a requests.Session
+        webhook: Webhook to notify
+        event_type: Type of event
+        data: Event data to send
+    """
+    # Prepare payload
+    payload = {
+        "event": event_type,
+        "data": data,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+    # Send POST request
+    response = http.post(
+        webhook.url,
+        json=payload,
+        timeout=10,
+        headers={"Content-Type": "application/json"}
+    )
+
+    # Update last triggered time
+    webhook.last_triggered_at = datetime.utcnow()
+
+    # Log response
+    print(f"Webhook sent to {webhook.url}: {response.status_code}")
+
+
+def _enabled_webhooks(db, event_type: str) -> list:
+    """Get all enabled webhooks for an event type"""
+    return db.query(Webhook).filter(
+        Webhook.event_type == event_type,
+        Webhook.is_enabled == True
+    ).all()
+
+
 @celery_app.task(bind=True, max_retries=3)
 def send_webhook_notification(self, event_type: str, data: dict):
     """
@@ -17,36 +60,13 @@ def send_webhook_notification(self, event_type: str, data: dict):
     db = SessionLocal()
     
     try:
-        # Get all enabled webhooks for this event type
-        webhooks = db.query(Webhook).filter(
-            Webhook.event_type == event_type,
-            Webhook.is_enabled == True
-        ).all()
+        webhooks = _enabled_webhooks(db, event_type)
         
         for webhook in webhooks:
             try:
-                # Prepare payload
-                payload = {
-                    "event": event_type,
-                    "data": data,
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-                
-                # Send POST request
-                response = requests.post(
-                    webhook.url,
-                    json=payload,
-                    timeout=10,
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                # Update last triggered time
-                webhook.last_triggered_at = datetime.utcnow()
+                _post_webhook(requests, webhook, event_type, data)
                 db.commit()
                 
-                # Log response
-                print(f"Webhook sent to {webhook.url}: {response.status_code}")
-                
             except requests.exceptions.RequestException as e:
                 print(f"Error sending webhook to {webhook.url}: {str(e)}")
                 # Don't fail the entire task if one webhook fails
@@ -61,3 +81,99 @@ def send_webhook_notification(self, event_type: str, data: dict):
     
     finally:
         db.close()
+
+
+@celery_app.task(bind=True, max_retries=3)
+def send_webhook_batch(self, event_type: str, items: list):
+    """
+    Fan out the notifications of a batch request to delivery tasks
+
+    Used by the batch endpoints instead of one send_webhook_notification per
+    product. Endpoints still receive one payload per product, in the same
+    format. Every enabled webhook gets one send_webhook_items task per
+    WEBHOOK_BATCH_SLICE_ITEMS items, so a large batch is spread over the
+    webhook workers and no single task runs into the time limit.
+
+    Args:
+        event_type: Type of event (product.created, product.updated, ...)
+        items: Event data to send, one entry per notification
+    """
+    db = SessionLocal()
+
+    try:
+        webhook_ids = [webhook.id for webhook in _enabled_webhooks(db, event_type)]
+
+    except SoftTimeLimitExceeded:
+        raise
+
+    except Exception as e:
+        print(f"Error in webhook batch task: {str(e)}")
+        # Nothing was sent yet, so a retry cannot duplicate deliveries
+        raise self.retry(exc=e, countdown=60)
+
+    finally:
+        db.close()
+
+    size = settings.WEBHOOK_BATCH_SLICE_ITEMS
+    tasks = 0
+    for webhook_id in webhook_ids:
+        for start in range(0, len(items), size):
+            send_webhook_items.delay(webhook_id, event_type, items[start:start + size])
+            tasks += 1
+
+    return {"status": "success", "webhooks": len(webhook_ids), "tasks": tasks}
+
+
+@celery_app.task(bind=True, max_retries=3)
+def send_webhook_items(self, webhook_id: int, event_type: str, items: list):
+    """
+    Deliver a slice of batch notifications to one webhook
+
+    Items go out one by one over a kept-alive connection. Only the items
+    that failed are retried, so delivered ones are never sent twice. After
+    WEBHOOK_BATCH_SLICE_SECONDS the rest of the slice is handed to a new
+    task instead of running into the soft time limit.
+
+    Args:
+        webhook_id: Webhook to notify
+        event_type: Type of event (product.created, product.updated, ...)
+        items: Event data to send, one entry per notification
+    """
+    db = SessionLocal()
+    started = time.monotonic()
+    sent = 0
+    failed = []
+    remaining = []
+
+    try:
+        webhook = db.get(Webhook, webhook_id)
+        if webhook is None or not webhook.is_enabled:
+            return {"status": "skipped", "webhooks_sent": 0}
+
+        with requests.Session() as http:
+            for index, data in enumerate(items):
+                # Send at least one item per task, so a slow endpoint still makes progress
+                if index and time.monotonic() - started > settings.WEBHOOK_BATCH_SLICE_SECONDS:
+                    remaining = items[index:]
+                    break
+                try:
+                    _post_webhook(http, webhook, event_type, data)
+                    sent += 1
+                except requests.exceptions.RequestException as e:
+                    print(f"Error sending webhook to {webhook.url}: {str(e)}")
+                    failed.append(data)
+
+        db.commit()
+
+    finally:
+        db.close()
+
+    if remaining:
+        send_webhook_items.delay(webhook_id, event_type, remaining)
+
+    if failed:
+        if self.request.retries < self.max_retries:
+            raise self.retry(args=(webhook_id, event_type, failed), countdown=60)
+        print(f"Giving up on {len(failed)} {event_type} notifications to webhook {webhook_id}")
+
+    return {"status": "success", "webhooks_sent": sent, "failed": len(failed), "deferred": len(remaining)}
@@ -0,0 +1,135 @@
+import pandas as pd
+import pytest
+from utils.csv_reader import CsvChunkReader, estimate_row_count, split_byte_ranges
+
+HEADER = "sku,name,description,price,quantity\n"
+
+
+def write_csv(tmp_path, rows, name="products.csv"):
+    path = tmp_path / name
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+    return str(path)
+
+
+def plain_rows(count, start=0):
+    return [f"SKU-{i:05d},Product {i:05d},Plain description,9.99,1\n" for i in range(start, start + count)]
+
+
+def read_all(path, chunk_rows, **kwargs):
+    chunks = []
+    with CsvChunkReader(path, **kwargs) as reader:
+        while (chunk := reader.read_chunk(chunk_rows)) is not None:
+            chunks.append(chunk)
+    return chunks
+
+
+def test_reader_chunks_plain_file(tmp_path):
+    path = write_csv(tmp_path, plain_rows(2500))
+
+    chunks = read_all(path, 1000)
+
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    assert chunks[-1]["sku"].iloc[-1] == "SKU-02499"
+
+
+def test_reader_keeps_quoted_newlines_in_one_record(tmp_path):
+    rows = plain_rows(3) + ['SKU-X,"Multi\nline ""quoted"" name",desc,1.00,2\n'] + plain_rows(3, start=3)
+    path = write_csv(tmp_path, rows)
+
+    chunks = read_all(path, 4)
+
+    assert [len(chunk) for chunk in chunks] == [4, 3]
+    assert chunks[0]["name"].iloc[3] == 'Multi\nline "quoted" name'
+
+
+def test_reader_ignores_stray_inch_mark(tmp_path):
+    rows = plain_rows(10) + ['SKU-M,Monitor 27" wide,Stray quote,199.00,5\n'] + plain_rows(9989, start=10)
+    path = write_csv(tmp_path, rows)
+
+    chunks = read_all(path, 1000)
+
+    assert [len(chunk) for chunk in chunks] == [1000] * 10
+    assert chunks[0]["name"].iloc[10] == 'Monitor 27" wide'
+    expected = pd.read_csv(path, dtype=str, keep_default_na=False)
+    assert pd.concat(chunks, ignore_index=True).equals(expected)
+
+
+def test_reader_stops_at_end_offset_after_stray_quote(tmp_path):
+    rows = ['SKU-M,Monitor 27" wide,Stray quote,199.00,5\n'] + plain_rows(99)
+    path = write_csv(tmp_path, rows)
+    end_offset = len(HEADER) + len(rows[0]) + len(rows[1])
+
+    chunks = read_all(path, 1000, end_offset=end_offset)
+
+    assert [len(chunk) for chunk in chunks] == [2]
+
+
+def test_reader_bounds_unclosed_quote(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.csv_reader.MAX_QUOTED_RECORD_BYTES", 1000)
+    rows = plain_rows(10) + ['SKU-Q,"Never closed,desc,1.00,1\n'] + plain_rows(200, start=10)
+    path = write_csv(tmp_path, rows)
+
+    with CsvChunkReader(path) as reader:
+        reader.read_chunk(10)
+        offset = reader.offset
+        # The chunk holding the open quote cannot be parsed, but it stops
+        # after MAX_QUOTED_RECORD_BYTES instead of swallowing the file
+        with pytest.raises(pd.errors.ParserError):
+            reader.read_chunk(5)
+        assert reader.offset - offset < 1000 + 10 * len(rows[0])
+        assert len(reader.read_chunk(5)) == 5
+
+
+def test_reader_follow_leaves_partial_record(tmp_path):
+    path = write_csv(tmp_path, plain_rows(5) + ['SKU-P,"Open\n'])
+
+    with CsvChunkReader(path, follow=True) as reader:
+        chunk = reader.read_chunk(100)
+        assert len(chunk) == 5
+        assert reader.read_chunk(100) is None
+
+
+def test_split_byte_ranges_cover_file_on_record_boundaries(tmp_path):
+    rows = []
+    for i in range(4000):
+        if i % 7 == 0:
+            rows.append(f'SKU-{i},"Name\nwith ""newline""",desc,1.00,1\n')
+        else:
+            rows.append(f"SKU-{i},Product {i},desc,1.00,1\n")
+    path = write_csv(tmp_path, rows)
+
+    for shard_count in (2, 3, 4, 7, 16):
+        ranges = split_byte_ranges(path, shard_count)
+        assert len(ranges) == shard_count
+        assert ranges[0][0] == len(HEADER)
+        assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+        skus = []
+        for start, end in ranges:
+            for chunk in read_all(path, 500, start_offset=start, end_offset=end):
+                skus.extend(chunk["sku"])
+        assert skus == [f"SKU-{i}" for i in range(4000)]
+
+
+def test_split_byte_ranges_ignores_stray_inch_mark(tmp_path):
+    rows = plain_rows(10) + ['SKU-M,Monitor 27" wide,Stray quote,199.00,5\n'] + plain_rows(9989, start=10)
+    path = write_csv(tmp_path, rows)
+
+    ranges = split_byte_ranges(path, 4)
+
+    assert len(ranges) == 4
+    rows_read = sum(len(chunk) for start, end in ranges for chunk in read_all(path, 1000, start_offset=start, end_offset=end))
+    assert rows_read == 10000
+
+
+def test_estimate_row_count_ignores_stray_inch_mark(tmp_path):
+    rows = plain_rows(10) + ['SKU-M,Monitor 27" wide,Stray quote,199.00,5\n'] + plain_rows(9989, start=10)
+    path = write_csv(tmp_path, rows)
+
+    assert abs(estimate_row_count(path) - 10000) <= 100
+
+
+def test_estimate_row_count_counts_small_file_exactly(tmp_path):
+    rows = plain_rows(3) + ['SKU-X,"Multi\nline",desc,1.00,2\n'] + plain_rows(2, start=3)
+    path = write_csv(tmp_path, rows)
+
+    assert estimate_row_count(path) == 6
@@ -3,9 +3,13 @@ from utils.validators import (
     validate_price,
     validate_quantity,
     validate_url,
-    validate_csv_headers
+    validate_csv_headers,
+    validate_chunk,
+    parse_bool_series
 )
 from utils.progress_tracker import ProgressTracker
+from utils.import_checkpoint import ImportCheckpoint
+from utils.upload_status import UploadStatus
 
 __all__ = [
     "validate_sku",
@@ -13,5 +17,9 @@ __all__ = [
     "validate_quantity",
     "validate_url",
     "validate_csv_headers",
-    "ProgressTracker"
+    "validate_chunk",
+    "parse_bool_series",
+    "ProgressTracker",
+    "ImportCheckpoint",
+    "UploadStatus"
 ]
@@ -0,0 +1,421 @@
+import io
+import re
+import time
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Temporary table that receives each chunk via COPY before it is merged
+STAGING_TABLE = "products_staging"
+
+# Columns written to the staging table, in COPY order
+STAGING_COLUMNS = ["row_num", "sku", "name", "description", "price", "quantity", "is_active"]
+
+# Import-wide staging tables (sharded imports) also record the shard of each row
+SHARD_STAGING_COLUMNS = ["shard"] + STAGING_COLUMNS
+
+# Column definitions shared by both kinds of staging table
+_STAGING_COLUMN_DDL = """
+    row_num BIGINT NOT NULL,
+    sku VARCHAR(100) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    description VARCHAR(1000),
+    price DOUBLE PRECISION NOT NULL,
+    quantity INTEGER NOT NULL,
+    is_active BOOLEAN NOT NULL
+"""
+
+
+def create_staging_table(db, table_name: str = STAGING_TABLE):
+    """
+    Create the session-local staging table if it does not exist yet
+
+    The table is a TEMP table with ON COMMIT DELETE ROWS, so it is emptied
+    after every chunk commit and never needs explicit cleanup. It is created
+    lazily per transaction because the pooled connection may change between
+    commits.
+
+    Args:
+        db: Database session
+        table_name: Name of the staging table
+    """
+    db.execute(text(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {table_name} ({_STAGING_COLUMN_DDL}) ON COMMIT DELETE ROWS
+    """))
+
+
+def import_staging_table_name(task_id: str) -> str:
+    """
+    Build the name of the import-wide staging table for a task
+
+    Args:
+        task_id: Unique task identifier
+
+    Returns:
+        str: Safe SQL identifier
+    """
+    return f"import_staging_{re.sub(r'[^0-9a-zA-Z]', '', task_id).lower()}"
+
+
+def create_import_staging_table(db, table_name: str):
+    """
+    Create an UNLOGGED staging table shared by all shards of one import
+
+    Unlike the per-chunk TEMP table it is visible to every worker connection,
+    so it must be dropped with drop_import_staging_table once merged.
+
+    Args:
+        db: Database session
+        table_name: Name from import_staging_table_name
+    """
+    db.execute(text(f"""
+        CREATE UNLOGGED TABLE IF NOT EXISTS {table_name} (
+            shard INTEGER NOT NULL,{_STAGING_COLUMN_DDL})
+    """))
+
+
+def drop_import_staging_table(db, table_name: str):
+    """
+    Drop an import-wide staging table
+
+    Args:
+        db: Database session
+        table_name: Name from import_staging_table_name
+    """
+    db.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+
+
+def copy_to_staging(
+    db,
+    rows: pd.DataFrame,
+    table_name: str = STAGING_TABLE,
+    columns: list = STAGING_COLUMNS
+) -> int:
+    """
+    Stream validated rows into the staging table with PostgreSQL COPY
+
+    Args:
+        db: Database session
+        rows: DataFrame holding the given columns
+        table_name: Name of the staging table
+        columns: Columns to copy, in table order
+
+    Returns:
+        int: Number of rows copied
+    """
+    if rows.empty:
+        return 0
+
+    buffer = io.StringIO()
+    rows.to_csv(buffer, columns=columns, index=False, header=False)
+    buffer.seek(0)
+
+    # COPY is not exposed by SQLAlchemy, so use the session's psycopg2 connection.
+    # FORCE_NOT_NULL keeps blank descriptions as "" like the ORM path does.
+    raw_connection = db.connection().connection
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table_name} ({', '.join(columns)}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL (description))",
+            buffer
+        )
+    return len(rows)
+
+
+def merge_staging(
+    db,
+    table_name: str = STAGING_TABLE,
+    order_by: str = "row_num DESC",
+    partition: tuple = None
+) -> tuple[int, int, int]:
+    """
+    Merge the staging table into products with one set-based upsert
+
+    Conflicts are resolved against the unique ix_products_sku_lower index. When
+    the same SKU (case-insensitive) is staged twice, the first row in order_by
+    wins, i.e. the last one in the file by default. The stored SKU spelling of
+    existing products is kept.
+
+    Rows whose values match the stored product column by column never reach
+    the INSERT, so re-importing an unchanged catalog writes nothing and leaves
+    updated_at alone.
+
+    With partition=(index, count) only the SKUs hashing to that partition are
+    merged. Partitions hold disjoint SKUs, so they can be merged concurrently
+    from separate connections without conflicting.
+
+    Args:
+        db: Database session
+        table_name: Name of the staging table
+        order_by: Tie-break ordering for duplicate SKUs
+        partition: (index, count) to merge one SKU hash partition
+
+    Returns:
+        tuple: (created_count, updated_count, unchanged_count)
+    """
+    params = {}
+    where = ""
+    if partition is not None:
+        params = {"partition": partition[0], "partitions": partition[1]}
+        where = "WHERE (hashtext(lower(sku)) & 2147483647) % :partitions = :partition"
+
+    result = db.execute(text(f"""
+        WITH deduped AS (
+            SELECT DISTINCT ON (lower(sku)) sku, name, description, price, quantity, is_active
+            FROM {table_name}
+            {where}
+            ORDER BY lower(sku), {order_by}
+        ),
+        changed AS (
+            SELECT d.*
+            FROM deduped d
+            LEFT JOIN products p ON lower(p.sku) = lower(d.sku)
+            WHERE p.id IS NULL
+               OR (p.name, p.description, p.price, p.quantity, p.is_active)
+                  IS DISTINCT FROM (d.name, d.description, d.price, d.quantity, d.is_active)
+        ),
+        upserted AS (
+            INSERT INTO products (sku, name, description, price, quantity, is_active)
+            SELECT sku, name, description, price, quantity, is_active
+            FROM changed
+            ON CONFLICT (lower(sku)) DO UPDATE SET
+                name = EXCLUDED.name,
+                description = EXCLUDED.description,
+                price = EXCLUDED.price,
+                quantity = EXCLUDED.quantity,
+                is_active = EXCLUDED.is_active,
+                updated_at = now()
+            WHERE (products.name, products.description, products.price, products.quantity, products.is_active)
+                  IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.description, EXCLUDED.price, EXCLUDED.quantity, EXCLUDED.is_active)
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT
+            (SELECT count(*) FROM deduped) AS staged,
+            count(*) FILTER (WHERE inserted) AS created,
+            count(*) FILTER (WHERE NOT inserted) AS updated
+        FROM upserted
+    """), params).one()
+    return result.created, result.updated, result.staged - result.created - result.updated
+
+
+def upsert_rows(db, rows: pd.DataFrame, table_name: str = STAGING_TABLE) -> tuple[int, int, int]:
+    """
+    Load a batch of validated rows into products via COPY + set-based upsert
+
+    Args:
+        db: Database session (the caller commits)
+        rows: DataFrame holding the STAGING_COLUMNS
+        table_name: Name of the staging table
+
+    Returns:
+        tuple: (created_count, updated_count, unchanged_count)
+    """
+    if rows.empty:
+        return 0, 0, 0
+
+    create_staging_table(db, table_name)
+    copy_to_staging(db, rows, table_name)
+    return merge_staging(db, table_name)
+
+
+# Shadow table that receives the new catalog of a replace import. It only
+# exists inside the transaction that swaps it in, so the name never clashes.
+SHADOW_TABLE = "products_shadow"
+
+# The swap waits at most this long per attempt for readers to finish; while
+# it waits, new readers queue behind it, so waits are kept short and retried
+SWAP_LOCK_TIMEOUT_MS = 2000
+SWAP_LOCK_ATTEMPTS = 10
+
+
+def _shadow_index_ddl(definition: str, temp_name: str) -> str:
+    """Point a pg_get_indexdef definition of a products index at the shadow table"""
+    return re.sub(
+        r"^(CREATE (?:UNIQUE )?INDEX )\S+ ON (?:ONLY )?\S+ ",
+        rf"\g<1>{temp_name} ON {SHADOW_TABLE} ",
+        definition
+    )
+
+
+def lock_products_table(db):
+    """
+    Take the ACCESS EXCLUSIVE lock on products without stalling readers for long
+
+    Each attempt runs in a savepoint with a short lock_timeout, so a long
+    running query only delays the swap (or truncate) instead of blocking
+    every reader queued behind it.
+
+    Raises:
+        OperationalError: If the lock could not be taken in SWAP_LOCK_ATTEMPTS attempts
+    """
+    for attempt in range(1, SWAP_LOCK_ATTEMPTS + 1):
+        savepoint = db.begin_nested()
+        try:
+            db.execute(text(f"SET LOCAL lock_timeout = {SWAP_LOCK_TIMEOUT_MS}"))
+            db.execute(text("LOCK TABLE products IN ACCESS EXCLUSIVE MODE"))
+            savepoint.commit()
+            break
+        except OperationalError:
+            savepoint.rollback()
+            if attempt == SWAP_LOCK_ATTEMPTS:
+                raise
+            print(f"Products table busy, retrying the lock ({attempt}/{SWAP_LOCK_ATTEMPTS})")
+            time.sleep(attempt)
+    db.execute(text("SET LOCAL lock_timeout = 0"))
+
+
+def replace_products(
+    db,
+    table_name: str,
+    order_by: str = "row_num DESC"
+) -> tuple[int, int, int, int]:
+    """
+    Replace the whole products table with the staged rows via a shadow table swap
+
+    The staged catalog is written in one INSERT into a shadow table that has
+    no indexes yet, and every index of products is then built once from its
+    pg_indexes definition. Products whose SKU is staged keep their id,
+    created_at and (when nothing changed) updated_at; new SKUs take ids from
+    the products sequence. Finally the old table is dropped and the shadow
+    table renamed to products.
+
+    Everything happens in the caller's transaction. Writes to products are
+    blocked from the start, reads only for the moment of the swap, and
+    readers never see a partial or empty catalog.
+
+    Args:
+        db: Database session (the caller commits)
+        table_name: Import-wide staging table holding the new catalog
+        order_by: Tie-break ordering for duplicate SKUs
+
+    Returns:
+        tuple: (created_count, updated_count, unchanged_count, removed_count)
+
+    Raises:
+        ValueError: If no rows are staged, which would empty the catalog
+    """
+    if not db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table_name})")).scalar():
+        raise ValueError("No valid rows to replace the catalog with; products were left unchanged")
+
+    # Concurrent writes would be lost by the swap, so they wait for it
+    db.execute(text("LOCK TABLE products IN EXCLUSIVE MODE"))
+    sequence = db.execute(text("SELECT pg_get_serial_sequence('products', 'id')")).scalar()
+    indexes = db.execute(text("""
+        SELECT i.relname AS name, pg_get_indexdef(i.oid) AS definition,
+               c.conname AS constraint_name, c.contype AS constraint_type
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+        WHERE x.indrelid = 'products'::regclass
+        ORDER BY i.relname
+    """)).all()
+
+    # 1. Load the shadow table without indexes
+    db.execute(text(f"""
+        CREATE TABLE {SHADOW_TABLE} (LIKE products INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+    """))
+    result = db.execute(text(f"""
+        WITH deduped AS (
+            SELECT DISTINCT ON (lower(sku)) sku, name, description, price, quantity, is_active
+            FROM {table_name}
+            ORDER BY lower(sku), {order_by}
+        ),
+        matched AS (
+            SELECT d.*, p.id AS product_id, p.sku AS product_sku,
+                   p.created_at AS product_created_at, p.updated_at AS product_updated_at,
+                   CASE
+                       WHEN p.id IS NULL THEN 'created'
+                       WHEN (p.name, p.description, p.price, p.quantity, p.is_active)
+                            IS DISTINCT FROM (d.name, d.description, d.price, d.quantity, d.is_active)
+                           THEN 'updated'
+                       ELSE 'unchanged'
+                   END AS outcome
+            FROM deduped d
+            LEFT JOIN products p ON lower(p.sku) = lower(d.sku)
+        ),
+        loaded AS (
+            INSERT INTO {SHADOW_TABLE} (id, sku, name, description, price, quantity, is_active, created_at, updated_at)
+            SELECT coalesce(product_id, nextval(CAST(:sequence AS regclass))),
+                   coalesce(product_sku, sku), name, description, price, quantity, is_active,
+                   coalesce(product_created_at, now()),
+                   CASE WHEN outcome = 'unchanged' THEN product_updated_at ELSE now() END
+            FROM matched
+        )
+        SELECT
+            count(*) FILTER (WHERE outcome = 'created') AS created,
+            count(*) FILTER (WHERE outcome = 'updated') AS updated,
+            count(*) FILTER (WHERE outcome = 'unchanged') AS unchanged,
+            (SELECT count(*) FROM products) - count(*) FILTER (WHERE outcome <> 'created') AS removed
+        FROM matched
+    """), {"sequence": sequence}).one()
+
+    # 2. Build every index once, under a temporary name
+    for i, index in enumerate(indexes):
+        db.execute(text(_shadow_index_ddl(index.definition, f"{SHADOW_TABLE}_idx_{i}")))
+
+    # 3. Swap: the sequence moves to the new table so dropping the old one keeps it
+    lock_products_table(db)
+    if sequence:
+        db.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {SHADOW_TABLE}.id"))
+    db.execute(text("DROP TABLE products"))
+    db.execute(text(f"ALTER TABLE {SHADOW_TABLE} RENAME TO products"))
+    for i, index in enumerate(indexes):
+        temp_name = f"{SHADOW_TABLE}_idx_{i}"
+        if index.constraint_type == "p":
+            db.execute(text(f"ALTER TABLE products ADD CONSTRAINT {index.constraint_name} PRIMARY KEY USING INDEX {temp_name}"))
+        elif index.constraint_type == "u":
+            db.execute(text(f"ALTER TABLE products ADD CONSTRAINT {index.constraint_name} UNIQUE USING INDEX {temp_name}"))
+        else:
+            db.execute(text(f"ALTER INDEX {temp_name} RENAME TO {index.name}"))
+
+    # The new table starts without planner statistics
+    db.execute(text("ANALYZE products"))
+
+    return result.created, result.updated, result.unchanged, result.removed
+
+
+def truncate_products(db) -> int:
+    """
+    Remove every product with TRUNCATE
+
+    Writers are blocked while the rows are counted; readers only wait for
+    the final ACCESS EXCLUSIVE lock (see lock_products_table). Product ids
+    keep counting up from where they were. The caller commits.
+
+    Args:
+        db: Database session
+
+    Returns:
+        int: Number of products removed
+    """
+    db.execute(text("LOCK TABLE products IN EXCLUSIVE MODE"))
+    count = db.execute(text("SELECT count(*) FROM products")).scalar()
+    lock_products_table(db)
+    db.execute(text("TRUNCATE products"))
+    return count
+
+
+def flush_gin_pending_lists(db):
+    """
+    Merge the pending lists of the GIN (search) indexes on products
+
+    GIN indexes buffer new entries in a pending list that every search has to
+    scan until autovacuum merges it. After a large import that list can be
+    big, so it is merged right away instead. Failures are only logged; the
+    import itself is already committed.
+
+    Args:
+        db: Database session (committed here)
+    """
+    try:
+        db.execute(text("""
+            SELECT gin_clean_pending_list(x.indexrelid)
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            JOIN pg_am am ON am.oid = i.relam
+            WHERE x.indrelid = 'products'::regclass AND am.amname = 'gin'
+        """))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Could not flush GIN pending lists: {e}")
@@ -0,0 +1,74 @@
+import time
+import redis
+from utils.progress_tracker import redis_client, async_redis_client
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_EPOCH_KEY = "catalog:epoch"
+
+# The epoch is replaced this often, which bounds how long a failed bump can
+# leave stale versions in use
+CATALOG_EPOCH_TTL = 3600  # 1 hour
+
+
+def _new_epoch() -> str:
+    """Build an epoch value that no earlier epoch had (milliseconds, hex)"""
+    return f"{int(time.time() * 1000):x}"
+
+
+class CatalogVersion:
+    """
+    Utility class for a Redis counter that changes whenever products change
+
+    Values cached for the catalog include the version in their key, so a
+    bump invalidates all of them at once; stale keys simply expire.
+
+    The version combines the counter with an epoch seeded with SET NX. A
+    Redis flush or restart that resets the counter also starts a new epoch,
+    so old versions (and ETags built from them) never come back. The epoch
+    expires after CATALOG_EPOCH_TTL, so a bump lost to a Redis error is
+    picked up within that time.
+    """
+
+    @staticmethod
+    def get() -> str:
+        """
+        Get the current catalog version
+
+        Returns:
+            str: "<epoch>.<counter>"; the counter is 0 before the first write
+        """
+        epoch, counter = redis_client.mget(CATALOG_EPOCH_KEY, CATALOG_VERSION_KEY)
+        if epoch is None:
+            redis_client.set(CATALOG_EPOCH_KEY, _new_epoch(), nx=True, ex=CATALOG_EPOCH_TTL)
+            epoch, counter = redis_client.mget(CATALOG_EPOCH_KEY, CATALOG_VERSION_KEY)
+        return f"{epoch}.{int(counter or 0)}"
+
+    @staticmethod
+    def bump():
+        """
+        Mark the catalog as changed after committing a write
+
+        A Redis outage must not fail a write that is already committed, so
+        errors are only logged; cached values then expire by their TTL.
+        """
+        try:
+            redis_client.incr(CATALOG_VERSION_KEY)
+        except redis.RedisError as e:
+            print(f"Could not bump catalog version: {e}")
+
+    @staticmethod
+    async def get_async() -> str:
+        """CatalogVersion.get for request handlers on the event loop"""
+        epoch, counter = await async_redis_client.mget(CATALOG_EPOCH_KEY, CATALOG_VERSION_KEY)
+        if epoch is None:
+            await async_redis_client.set(CATALOG_EPOCH_KEY, _new_epoch(), nx=True, ex=CATALOG_EPOCH_TTL)
+            epoch, counter = await async_redis_client.mget(CATALOG_EPOCH_KEY, CATALOG_VERSION_KEY)
+        return f"{epoch}.{int(counter or 0)}"
+
+    @staticmethod
+    async def bump_async():
+        """CatalogVersion.bump for request handlers on the event loop"""
+        try:
+            await async_redis_client.incr(CATALOG_VERSION_KEY)
+        except redis.RedisError as e:
+            print(f"Could not bump catalog version: {e}")
@@ -0,0 +1,122 @@
+import sys
+from config import settings
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def current_rss_mb() -> float:
+    """
+    Get the resident set size of this process in MB
+
+    Reads /proc on Linux; elsewhere falls back to the peak RSS, which only grows.
+
+    Returns:
+        float: RSS in MB, or 0 if it cannot be measured
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, AttributeError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """
+    Get the peak resident set size of this process in MB
+
+    Returns:
+        float: Peak RSS in MB, or 0 if it cannot be measured
+    """
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class AdaptiveChunkSizer:
+    """
+    Chooses the number of rows per import chunk from measured chunk durations
+
+    After every non-empty chunk, short ones included, the next size is set to
+    the number of rows the last chunk's throughput (rows per second) would
+    process in the target time, changing by at most a factor of two per step.
+    Chunks stop growing near the memory limit and are halved above it.
+    """
+
+    def __init__(
+        self,
+        initial_rows: int = None,
+        min_rows: int = None,
+        max_rows: int = None,
+        target_seconds: float = None,
+        memory_limit_mb: float = None
+    ):
+        """
+        Args:
+            initial_rows: Size of the first chunk (defaults to settings.IMPORT_CHUNK_INITIAL_ROWS)
+            min_rows: Lower bound (defaults to settings.IMPORT_CHUNK_MIN_ROWS)
+            max_rows: Upper bound (defaults to settings.IMPORT_CHUNK_MAX_ROWS)
+            target_seconds: Target duration per chunk (defaults to settings.IMPORT_CHUNK_TARGET_SECONDS)
+            memory_limit_mb: RSS ceiling (defaults to settings.IMPORT_MEMORY_LIMIT_MB)
+        """
+        self.min_rows = min_rows or settings.IMPORT_CHUNK_MIN_ROWS
+        self.max_rows = max(max_rows or settings.IMPORT_CHUNK_MAX_ROWS, self.min_rows)
+        self.target_seconds = target_seconds or settings.IMPORT_CHUNK_TARGET_SECONDS
+        self.memory_limit_mb = memory_limit_mb or settings.IMPORT_MEMORY_LIMIT_MB
+        self.size = self._clamp(initial_rows or settings.IMPORT_CHUNK_INITIAL_ROWS)
+        self.sizes = []
+        self.peak_rss_mb = 0.0
+
+    def _clamp(self, rows: float) -> int:
+        return int(min(max(rows, self.min_rows), self.max_rows))
+
+    def record(self, rows: int, elapsed: float) -> int:
+        """
+        Record a finished chunk and choose the size of the next one
+
+        Args:
+            rows: Rows in the chunk
+            elapsed: Seconds spent reading, validating, writing and committing it
+
+        Returns:
+            int: Rows for the next chunk
+        """
+        self.sizes.append(rows)
+        rss_mb = current_rss_mb()
+        self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+
+        if rows <= 0 or elapsed <= 0:
+            return self.size
+
+        # Throughput rather than size: follow-mode and streamed imports often
+        # read chunks shorter than requested, and those still count
+        target = rows / elapsed * self.target_seconds
+        target = min(max(target, self.size / 2), self.size * 2)
+
+        if self.memory_limit_mb and rss_mb > self.memory_limit_mb:
+            target = min(target, self.size / 2)
+        elif self.memory_limit_mb and rss_mb > 0.8 * self.memory_limit_mb:
+            target = min(target, self.size)
+
+        self.size = self._clamp(target)
+        return self.size
+
+    def summary(self) -> dict:
+        """
+        Summarize chosen sizes for the task result
+
+        Returns:
+            dict: Chunk count, min/max/last size and peak RSS
+        """
+        return {
+            "chunks": len(self.sizes),
+            "min_rows": min(self.sizes, default=0),
+            "max_rows": max(self.sizes, default=0),
+            "last_rows": self.sizes[-1] if self.sizes else 0,
+            "peak_rss_mb": round(self.peak_rss_mb, 1)
+        }
@@ -0,0 +1,169 @@
+import os
+import pandas as pd
+from typing import Optional
+
+# Columnar upload formats, read with pyarrow
+COLUMNAR_EXTENSIONS = (".parquet", ".arrow", ".feather")
+
+# Only these columns are read from columnar files
+PRODUCT_COLUMNS = ("sku", "name", "description", "price", "quantity", "is_active")
+
+# Rows decoded per Parquet batch; chunks are sliced from these
+PARQUET_BATCH_ROWS = 65536
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("pyarrow is required to import Parquet and Arrow files")
+    return pyarrow
+
+
+def is_columnar_file(file_path: str) -> bool:
+    """
+    Check whether a file is a Parquet or Arrow IPC file by its extension
+
+    Args:
+        file_path: Path or name of the file
+
+    Returns:
+        bool: True for columnar files
+    """
+    return file_path.lower().endswith(COLUMNAR_EXTENSIONS)
+
+
+class ColumnarChunkReader:
+    """
+    Chunked reader for Parquet and Arrow IPC files with the CsvChunkReader interface
+
+    Only the product columns are read (projection), and Arrow IPC files are
+    memory-mapped. Columns keep their types, so validate_chunk skips string
+    parsing for numeric and boolean columns. Offsets count rows instead of
+    bytes; raw_offset maps them onto the file size for progress.
+    """
+
+    def __init__(self, file_path: str, start_offset: Optional[int] = None):
+        """
+        Args:
+            file_path: Path to the Parquet or Arrow IPC file
+            start_offset: Number of rows to skip (from a checkpoint)
+        """
+        pa = _import_pyarrow()
+        self._file_size = os.path.getsize(file_path)
+        self._mmap = None
+
+        if file_path.lower().endswith(".parquet"):
+            self._parquet = pa.parquet.ParquetFile(file_path, memory_map=True)
+            schema = self._parquet.schema_arrow
+            self.num_rows = self._parquet.metadata.num_rows
+        else:
+            self._parquet = None
+            self._mmap = pa.memory_map(file_path)
+            try:
+                self._ipc = pa.ipc.open_file(self._mmap)
+                self.num_rows = sum(
+                    self._ipc.get_batch(i).num_rows for i in range(self._ipc.num_record_batches)
+                )
+            except pa.ArrowInvalid:
+                # Arrow IPC stream format has no footer: count the rows in one
+                # pass over the mapped batches, then reopen for reading
+                self._mmap.seek(0)
+                self.num_rows = sum(batch.num_rows for batch in pa.ipc.open_stream(self._mmap))
+                self._mmap.seek(0)
+                self._ipc = pa.ipc.open_stream(self._mmap)
+            schema = self._ipc.schema
+
+        # Project the product columns, matched case-insensitively like CSV headers
+        self._source_columns = [name for name in schema.names if name.strip().lower() in PRODUCT_COLUMNS]
+        self.columns = [name.strip().lower() for name in schema.names]
+        self.follow = False
+        self.compressed = False
+        self.data_start = 0
+        self.offset = start_offset or 0
+        self.rows_read = 0
+        self.has_data = self.num_rows > 0
+        self._batches = self._iter_batches(self.offset)
+        self._pending = None
+
+    @property
+    def raw_offset(self) -> int:
+        """Approximate position in the file, proportional to the rows consumed"""
+        if not self.num_rows:
+            return 0
+        return self._file_size * min(self.offset, self.num_rows) // self.num_rows
+
+    def _iter_batches(self, start_row: int):
+        """Yield projected record batches starting at start_row"""
+        skip = start_row
+
+        if self._parquet is not None:
+            # Skip whole row groups using the footer metadata
+            metadata = self._parquet.metadata
+            first_group = 0
+            while first_group < metadata.num_row_groups and skip >= metadata.row_group(first_group).num_rows:
+                skip -= metadata.row_group(first_group).num_rows
+                first_group += 1
+            batches = self._parquet.iter_batches(
+                batch_size=PARQUET_BATCH_ROWS,
+                row_groups=range(first_group, metadata.num_row_groups),
+                columns=self._source_columns
+            )
+        elif hasattr(self._ipc, "get_batch"):
+            batches = (self._ipc.get_batch(i) for i in range(self._ipc.num_record_batches))
+        else:
+            batches = iter(self._ipc)
+
+        for batch in batches:
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            if skip:
+                batch = batch.slice(skip)
+                skip = 0
+            yield batch.select(self._source_columns)
+
+    def read_chunk(self, max_rows: int) -> Optional[pd.DataFrame]:
+        """
+        Read up to max_rows rows from the current offset
+
+        Args:
+            max_rows: Maximum number of rows in the chunk
+
+        Returns:
+            pd.DataFrame: Chunk with normalized column names, or None when exhausted
+        """
+        pa = _import_pyarrow()
+        parts = []
+        rows = 0
+
+        while rows < max_rows:
+            if self._pending is None:
+                self._pending = next(self._batches, None)
+                if self._pending is None:
+                    break
+            part = self._pending.slice(0, max_rows - rows)
+            rows += part.num_rows
+            parts.append(part)
+            self._pending = self._pending.slice(part.num_rows) if part.num_rows < self._pending.num_rows else None
+
+        if not rows:
+            return None
+
+        chunk = pa.Table.from_batches(parts).to_pandas()
+        chunk.columns = [name.strip().lower() for name in chunk.columns]
+        self.offset += rows
+        self.rows_read += rows
+        return chunk
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,431 @@
+import csv
+import gzip
+import io
+import os
+import re
+import zipfile
+import pandas as pd
+from typing import Optional
+from utils.columnar_reader import COLUMNAR_EXTENSIONS, ColumnarChunkReader, is_columnar_file
+
+# Accepted upload formats; compressed files are decompressed while reading
+COMPRESSED_EXTENSIONS = (".csv.gz", ".csv.zst", ".zip")
+UPLOAD_EXTENSIONS = (".csv",) + COMPRESSED_EXTENSIONS + COLUMNAR_EXTENSIONS
+
+# A quoted field still open after this many bytes is taken for a stray quote,
+# and records are split on plain newlines again
+MAX_QUOTED_RECORD_BYTES = 1024 * 1024
+
+# A quote character opens a quoted field only at the start of a field
+_FIELD_QUOTE = re.compile(rb'(?<![^,\r\n])"')
+_QUOTE_RUN = re.compile(rb'"+')
+
+
+def upload_extension(filename: str) -> Optional[str]:
+    """
+    Get the accepted upload extension a file name ends with
+
+    Args:
+        filename: Original file name
+
+    Returns:
+        str: Matching extension from UPLOAD_EXTENSIONS, or None if not accepted
+    """
+    lowered = filename.lower()
+    for extension in COMPRESSED_EXTENSIONS + COLUMNAR_EXTENSIONS + (".csv",):
+        if lowered.endswith(extension):
+            return extension
+    return None
+
+
+def open_csv_stream(file_path: str) -> tuple:
+    """
+    Open a CSV file for binary reading, decompressing .gz, .zst and .zip files on the fly
+
+    Args:
+        file_path: Path to the CSV file
+
+    Returns:
+        tuple: (stream of CSV bytes, underlying raw file); both must be closed by the caller
+    """
+    raw = open(file_path, "rb")
+    try:
+        if file_path.endswith(".gz"):
+            return gzip.GzipFile(fileobj=raw), raw
+        if file_path.endswith(".zst"):
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("zstandard is required to import .zst files")
+            return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw)), raw
+        if file_path.endswith(".zip"):
+            archive = zipfile.ZipFile(raw)
+            entries = [info for info in archive.infolist() if not info.is_dir()]
+            if len(entries) != 1:
+                raise ValueError("ZIP archive must contain exactly one CSV file")
+            return archive.open(entries[0]), raw
+    except Exception:
+        raw.close()
+        raise
+    return raw, raw
+
+
+def _ends_in_quotes(data: bytes, in_quotes: bool = False) -> bool:
+    """
+    Tell whether CSV data ends inside a quoted field
+
+    Follows the rules of the csv module and pandas: a quote character opens a
+    quoted field only at the start of a field, so the inch mark in an unquoted
+    value like `Monitor 27" wide` is a literal character. Inside a quoted field
+    two quote characters are an escaped quote and a single one closes it.
+
+    Args:
+        data: Whole lines of CSV
+        in_quotes: Whether data starts inside a quoted field
+
+    Returns:
+        bool: True if data ends inside a quoted field
+    """
+    position = 0
+    while True:
+        if in_quotes:
+            position = data.find(b'"', position)
+            if position < 0:
+                return True
+            run = _QUOTE_RUN.match(data, position)
+            # Quotes pair up as escapes; an odd one out closes the field
+            in_quotes = (run.end() - position) % 2 == 0
+            position = run.end()
+        else:
+            match = _FIELD_QUOTE.search(data, position)
+            if not match:
+                return False
+            position = match.end()
+            in_quotes = True
+
+
+def read_csv_header(file_path: str) -> list:
+    """
+    Read and normalize the header row of a CSV file (or the column names of a columnar file)
+
+    Args:
+        file_path: Path to the CSV file
+
+    Returns:
+        list: Lowercased, stripped column names
+    """
+    if is_columnar_file(file_path):
+        with ColumnarChunkReader(file_path) as reader:
+            return reader.columns
+
+    stream, raw = open_csv_stream(file_path)
+    with raw, stream:
+        header = stream.readline()
+    return parse_header_line(header)
+
+
+def parse_header_line(header: bytes) -> list:
+    """
+    Parse and normalize a raw CSV header line
+
+    Args:
+        header: First line of the file, with or without the newline
+
+    Returns:
+        list: Lowercased, stripped column names
+    """
+    row = next(csv.reader([header.decode("utf-8-sig")]), [])
+    return [column.strip().lower() for column in row]
+
+
+def estimate_row_count(file_path: str, sample_bytes: int = 65536, file_size: Optional[int] = None) -> int:
+    """
+    Estimate the number of data rows from the average size of sampled records
+
+    Only the first sample_bytes of data are read. Small files are therefore
+    counted exactly, large ones extrapolated from the file size. For compressed
+    files the sample covers at least four times sample_bytes of compressed
+    input and is extrapolated by the observed compression ratio.
+
+    Args:
+        file_path: Path to the CSV file
+        sample_bytes: Number of data bytes to sample
+        file_size: Final file size if the file is still being written
+
+    Returns:
+        int: Estimated number of data rows
+    """
+    if is_columnar_file(file_path):
+        # Exact count from the file metadata
+        with ColumnarChunkReader(file_path) as reader:
+            return reader.num_rows
+
+    file_size = file_size or os.path.getsize(file_path)
+    stream, raw = open_csv_stream(file_path)
+
+    with raw, stream:
+        stream.readline()  # Skip header
+        if stream is raw:
+            data_size = file_size - raw.tell()
+            sample = stream.read(sample_bytes)
+            exhausted = len(sample) >= data_size
+        else:
+            # Decompressed size is unknown until the end of the stream.
+            # Decompressors fetch input in blocks, so the ratio is taken just
+            # before a fetch, when all earlier input has been decompressed.
+            data_start = stream.tell()
+            pieces = []
+            position, raw_position = data_start, 0
+            exhausted = False
+            while raw_position < 4 * sample_bytes:
+                before = (stream.tell(), raw.tell())
+                piece = stream.read(4096)
+                if not piece:
+                    exhausted = True
+                    break
+                pieces.append(piece)
+                if raw.tell() != before[1]:
+                    position, raw_position = before
+            sample = b"".join(pieces)
+            if exhausted:
+                data_size = len(sample)
+            else:
+                sample = sample[:position - data_start]
+                data_size = round(file_size * position / raw_position) - data_start
+
+    records = 0
+    record_bytes = 0
+    consumed = 0
+    in_quotes = False
+
+    for line in sample.splitlines(keepends=True):
+        consumed += len(line)
+        in_quotes = _ends_in_quotes(line, in_quotes)
+        if in_quotes and consumed - record_bytes > MAX_QUOTED_RECORD_BYTES:
+            in_quotes = False
+        if not in_quotes and line.strip() and (line.endswith(b"\n") or consumed == data_size):
+            records += 1
+            record_bytes = consumed
+
+    if not records:
+        return 0
+    if exhausted:
+        return records
+    return round(data_size * records / record_bytes)
+
+
+def _quoted_at(f, start: int, end: int) -> bool:
+    """Tell whether the line-aligned offset end of a binary file lies inside a quoted field, scanning from start"""
+    f.seek(start)
+    in_quotes = False
+    record_start = start
+    position = start
+    while position < end:
+        # Whole lines, so a quoted field never spans two blocks unseen
+        block = f.read(min(end - position, 1024 * 1024))
+        if not block:
+            break
+        if not block.endswith(b"\n") and position + len(block) < end:
+            block += f.readline()
+        in_quotes = _ends_in_quotes(block, in_quotes)
+        position += len(block)
+        if in_quotes and position - record_start > MAX_QUOTED_RECORD_BYTES:
+            in_quotes = False
+        if not in_quotes:
+            record_start = position
+    return in_quotes
+
+
+def split_byte_ranges(file_path: str, shard_count: int) -> list:
+    """
+    Split the data section of a CSV file into newline-aligned byte ranges
+
+    Boundaries are moved forward to the start of the next record, so every
+    range holds whole records. Like CsvChunkReader, a newline inside a quoted
+    field does not end a record, so a boundary that falls inside a quoted
+    multi-line field moves past the end of that field. Finding the quoted
+    fields reads the file up to the last boundary once.
+
+    Args:
+        file_path: Path to the CSV file
+        shard_count: Desired number of ranges
+
+    Returns:
+        list: (start_offset, end_offset) tuples covering every data byte
+    """
+    file_size = os.path.getsize(file_path)
+
+    with open(file_path, "rb") as f:
+        f.readline()  # Skip header
+        data_start = f.tell()
+        boundaries = [data_start]
+
+        for i in range(1, shard_count):
+            target = data_start + (file_size - data_start) * i // shard_count
+            if target <= boundaries[-1]:
+                continue
+            # Seek one byte back so a target that already starts a line is kept
+            f.seek(target - 1)
+            f.readline()
+            position = f.tell()
+            # Boundaries lie outside quotes, so scanning starts at the last one
+            in_quotes = _quoted_at(f, boundaries[-1], position)
+            f.seek(position)
+            field_start = position
+            while in_quotes and position < file_size:
+                line = f.readline()
+                position += len(line)
+                in_quotes = _ends_in_quotes(line, in_quotes)
+                if position - field_start > MAX_QUOTED_RECORD_BYTES:
+                    # Stray quote: fall back to the newline after the target
+                    position = field_start
+                    break
+            if position >= file_size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+
+    boundaries.append(file_size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def open_chunk_reader(file_path: str, start_offset: Optional[int] = None, follow: bool = False):
+    """
+    Open the chunked reader matching the file format
+
+    Args:
+        file_path: Path to a CSV (optionally compressed), Parquet or Arrow IPC file
+        start_offset: Offset to resume from, as stored by a checkpoint
+        follow: Only consume complete records of a file that is still growing (CSV only)
+
+    Returns:
+        CsvChunkReader or ColumnarChunkReader
+    """
+    if is_columnar_file(file_path):
+        return ColumnarChunkReader(file_path, start_offset)
+    return CsvChunkReader(file_path, start_offset, follow=follow)
+
+
+class CsvChunkReader:
+    """
+    Chunked CSV reader that tracks the exact byte offset of every chunk
+
+    Records are split on newlines outside quoted fields, so quoted values may
+    contain newlines. A quoted field that is still open after
+    MAX_QUOTED_RECORD_BYTES is taken for a stray quote, and records are split
+    on plain newlines again. Each chunk is parsed by pandas with all cells as raw
+    strings, ready for validate_chunk.
+
+    With follow=True the file is treated as still being written: a record
+    whose final newline has not arrived yet is left unread for the next call.
+
+    Compressed files are decompressed on the fly. Offsets then refer to the
+    decompressed stream, while raw_offset reports the position in the file on
+    disk for progress.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        start_offset: Optional[int] = None,
+        end_offset: Optional[int] = None,
+        follow: bool = False
+    ):
+        """
+        Args:
+            file_path: Path to the CSV file
+            start_offset: Byte offset of the first record to read (defaults to the first data row)
+            end_offset: Stop once this byte offset is reached (defaults to end of file)
+            follow: Only consume newline-terminated records (file is still growing)
+        """
+        self._file, self._raw = open_csv_stream(file_path)
+        self.compressed = self._file is not self._raw
+        self.follow = follow
+        self.columns = parse_header_line(self._file.readline())
+        self.data_start = self._file.tell()
+        self.has_data = follow or bool(self._file.peek(1))
+        self.offset = max(start_offset or 0, self.data_start)
+        self.end_offset = end_offset
+        self.rows_read = 0
+        self._seek(self.offset)
+
+    @property
+    def raw_offset(self) -> int:
+        """Position reached in the file on disk (compressed bytes for compressed files)"""
+        return self._raw.tell() if self.compressed else self.offset
+
+    def _seek(self, offset: int):
+        """Move to offset, skipping forward through streams that cannot seek"""
+        if self._file.seekable():
+            self._file.seek(offset)
+            return
+        remaining = offset - self._file.tell()
+        while remaining > 0:
+            skipped = len(self._file.read(min(remaining, 1024 * 1024)))
+            if not skipped:
+                break
+            remaining -= skipped
+
+    def read_chunk(self, max_rows: int) -> Optional[pd.DataFrame]:
+        """
+        Read up to max_rows records from the current offset
+
+        Args:
+            max_rows: Maximum number of records in the chunk
+
+        Returns:
+            pd.DataFrame: Chunk with normalized column names, or None when exhausted
+        """
+        lines = []
+        rows = 0
+        in_quotes = False
+        # Lines and offset up to the end of the last complete record
+        complete_lines = 0
+        complete_offset = self.offset
+
+        while rows < max_rows:
+            if not in_quotes and self.end_offset is not None and self.offset >= self.end_offset:
+                break
+            line = self._file.readline()
+            if not line or (self.follow and not line.endswith(b"\n")):
+                break
+            self.offset += len(line)
+            lines.append(line)
+            in_quotes = _ends_in_quotes(line, in_quotes)
+            if in_quotes and self.offset - complete_offset > MAX_QUOTED_RECORD_BYTES:
+                in_quotes = False
+            if not in_quotes:
+                if line.strip():
+                    rows += 1
+                complete_lines = len(lines)
+                complete_offset = self.offset
+
+        if self.follow:
+            # Leave a partially written record for the next call
+            del lines[complete_lines:]
+            self.offset = complete_offset
+            self._seek(self.offset)
+
+        if not rows:
+            return None
+
+        chunk = pd.read_csv(
+            io.BytesIO(b"".join(lines)),
+            header=None,
+            names=self.columns,
+            index_col=False,
+            dtype=str,
+            keep_default_na=False
+        )
+        self.rows_read += len(chunk)
+        return chunk
+
+    def close(self):
+        self._file.close()
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
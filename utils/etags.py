@@ -0,0 +1,90 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi.responses import Response
+
+
+def list_etag(version: str, params: dict) -> str:
+    """
+    Build the weak ETag of a product listing
+
+    Every product write bumps the catalog version, so the version and the
+    request parameters identify the response without querying it. The
+    version carries an epoch, so a reset counter cannot revive old ETags.
+
+    Args:
+        version: Current catalog version from CatalogVersion
+        params: Normalized request parameters
+
+    Returns:
+        str: Weak ETag
+    """
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+    return f'W/"products-{version}-{digest}"'
+
+
+def product_etag(product_id: int, updated_at: Optional[datetime]) -> str:
+    """
+    Build the weak ETag of a single product from its updated_at
+
+    Args:
+        product_id: Product id
+        updated_at: Last modification time of the product
+
+    Returns:
+        str: Weak ETag
+    """
+    stamp = int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+    return f'W/"product-{product_id}-{stamp}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison)
+
+    Args:
+        if_none_match: Header value, possibly a list of tags or "*"
+        etag: Current ETag of the resource
+
+    Returns:
+        bool: True if the client's copy is current
+    """
+    if not if_none_match or not etag:
+        return False
+    current = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == current:
+            return True
+    return False
+
+
+def with_etag(response: Response, etag: Optional[str]) -> Response:
+    """
+    Add an ETag to a response and ask clients to revalidate before reusing it
+
+    Args:
+        response: Response to send
+        etag: ETag of its content, or None to leave it unchanged
+
+    Returns:
+        Response: The same response
+    """
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Build a 304 Not Modified response
+
+    Args:
+        etag: Current ETag of the resource
+
+    Returns:
+        Response: Empty 304 response
+    """
+    return with_etag(Response(status_code=304), etag)
@@ -0,0 +1,72 @@
+import json
+import time
+from utils.progress_tracker import redis_client
+
+# Checkpoints outlive progress keys so a failed import can be resumed later
+CHECKPOINT_TTL = 86400  # 24 hours
+
+
+class ImportCheckpoint:
+    """Utility class for storing resumable import checkpoints in Redis"""
+
+    @staticmethod
+    def save(
+        task_id: str,
+        file_path: str,
+        load_mode: str,
+        offset: int,
+        rows: int,
+        counts: dict,
+        rejected_bytes: int = 0,
+        import_mode: str = "upsert"
+    ):
+        """
+        Store the position reached after a committed chunk
+
+        Args:
+            task_id: Unique task identifier
+            file_path: Path to the file being imported
+            load_mode: Load mode of the import
+            offset: Byte offset of the next unread record
+            rows: Data rows processed so far
+            counts: Running result counts (created, updated, unchanged, errors)
+            rejected_bytes: Size of the rejected-rows sidecar written so far
+            import_mode: "upsert" or "replace"
+        """
+        data = {
+            "file_path": file_path,
+            "load_mode": load_mode,
+            "import_mode": import_mode,
+            "offset": offset,
+            "rows": rows,
+            "counts": counts,
+            "rejected_bytes": rejected_bytes,
+            "saved_at": time.time()
+        }
+        redis_client.setex(f"checkpoint:{task_id}", CHECKPOINT_TTL, json.dumps(data))
+
+    @staticmethod
+    def get(task_id: str):
+        """
+        Get the last checkpoint of an import
+
+        Args:
+            task_id: Unique task identifier
+
+        Returns:
+            dict: Checkpoint data or None if not found
+        """
+        data = redis_client.get(f"checkpoint:{task_id}")
+        if data:
+            return json.loads(data)
+        return None
+
+    @staticmethod
+    def clear(task_id: str):
+        """
+        Delete the checkpoint of a finished import
+
+        Args:
+            task_id: Unique task identifier
+        """
+        redis_client.delete(f"checkpoint:{task_id}")
@@ -0,0 +1,142 @@
+import os
+import socket
+from sqlalchemy.sql import func
+from models import ImportJob
+from models.import_job import IMPORT_PHASES
+from utils.phase_timer import PhaseTimer
+
+
+def _file_format(file_name: str) -> str:
+    """Format of an import file from its name, e.g. "csv", "csv.gz" or "parquet\""""
+    name = os.path.basename(file_name).lower()
+    return name.split(".", 1)[1] if "." in name else ""
+
+
+def record_upload(db, task_id: str, file_name: str, file_size: int, upload_seconds: float = 0) -> ImportJob:
+    """
+    Create or update the job of an upload once it is stored
+
+    Args:
+        db: Database session (committed here)
+        task_id: Unique task identifier
+        file_name: Original file name
+        file_size: Uploaded bytes
+        upload_seconds: Time spent receiving and storing the file
+
+    Returns:
+        ImportJob: The job
+    """
+    job = db.query(ImportJob).filter(ImportJob.task_id == task_id).first()
+    if job is None:
+        job = ImportJob(task_id=task_id, status="queued")
+        db.add(job)
+    job.file_name = file_name[:255]
+    job.file_format = _file_format(file_name)
+    job.file_size = file_size
+    job.upload_seconds = round(upload_seconds, 3)
+    db.commit()
+    return job
+
+
+def start_import_job(
+    db,
+    task_id: str,
+    file_path: str,
+    load_mode: str,
+    worker_host: str = None,
+    import_mode: str = "upsert"
+) -> ImportJob:
+    """
+    Mark the job of an import as running, creating it if the upload did not
+
+    Args:
+        db: Database session (committed here)
+        task_id: Unique task identifier
+        file_path: Path of the stored file
+        load_mode: Load mode of the import
+        worker_host: Host running the import (defaults to this host)
+        import_mode: "upsert" or "replace"
+
+    Returns:
+        ImportJob: The job
+    """
+    job = db.query(ImportJob).filter(ImportJob.task_id == task_id).first()
+    if job is None:
+        job = ImportJob(
+            task_id=task_id,
+            file_name=os.path.basename(file_path),
+            file_format=_file_format(file_path),
+            file_size=os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        )
+        db.add(job)
+    job.load_mode = load_mode
+    job.import_mode = import_mode
+    job.status = "running"
+    job.worker_host = (worker_host or socket.gethostname())[:255]
+    db.commit()
+    return job
+
+
+def job_timer(job: ImportJob) -> PhaseTimer:
+    """
+    Create a phase timer that continues from the phase times stored on a job
+
+    Args:
+        job: Job of a new or resumed import
+
+    Returns:
+        PhaseTimer: Timer seeded with the job's processing phases
+    """
+    return PhaseTimer({
+        phase: getattr(job, f"{phase}_seconds") or 0.0
+        for phase in IMPORT_PHASES if phase != "upload"
+    })
+
+
+def finish_import_job(
+    db,
+    job: ImportJob,
+    status: str,
+    counts: dict = None,
+    rows_total: int = 0,
+    timer: PhaseTimer = None,
+    error_message: str = None,
+    total_seconds: float = None
+):
+    """
+    Store the outcome, row counts and phase timings of an import
+
+    total_seconds is the processing time (all phases but upload), so
+    rows_per_second compares imports independently of upload speed.
+
+    Args:
+        db: Database session (committed here)
+        job: Job to update
+        status: "complete" or "error"
+        counts: Result counts (created, updated, unchanged, errors, duplicates, removed)
+        rows_total: Data rows processed
+        timer: Phase timings of the import
+        error_message: Error description for failed imports
+        total_seconds: Wall time when phases overlap (sharded imports);
+            defaults to the sum of the phases
+    """
+    counts = counts or {}
+    job.status = status
+    job.error_message = error_message[:1000] if error_message else None
+    job.rows_total = rows_total
+    job.rows_created = counts.get("created", 0)
+    job.rows_updated = counts.get("updated", 0)
+    job.rows_unchanged = counts.get("unchanged", 0)
+    job.rows_rejected = counts.get("errors", 0)
+    job.rows_duplicate = counts.get("duplicates", 0)
+    job.rows_removed = counts.get("removed", 0)
+
+    if timer is not None:
+        for phase, seconds in timer.seconds.items():
+            if phase in IMPORT_PHASES and phase != "upload":
+                setattr(job, f"{phase}_seconds", round(seconds, 3))
+        job.total_seconds = round(timer.total() if total_seconds is None else total_seconds, 3)
+        job.rows_per_second = round(rows_total / job.total_seconds, 1) if job.total_seconds > 0 else 0
+
+    job.finished_at = func.now()
+    db.commit()
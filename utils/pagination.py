@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+
+# Directions a cursor can page in
+CURSOR_DIRECTIONS = ("next", "prev")
+
+
+def encode_cursor(created_at: datetime, product_id: int, direction: str) -> str:
+    """
+    Encode a keyset position as an opaque cursor token
+
+    Args:
+        created_at: created_at of the boundary product
+        product_id: id of the boundary product
+        direction: "next" for rows after it, "prev" for rows before it
+
+    Returns:
+        str: URL-safe cursor token
+    """
+    payload = json.dumps([created_at.isoformat(), product_id, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, int, str]:
+    """
+    Decode a cursor token created by encode_cursor
+
+    Args:
+        token: Cursor token from a previous response
+
+    Returns:
+        tuple: (created_at, product_id, direction)
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, product_id, direction = json.loads(payload)
+        created_at = datetime.fromisoformat(created_at)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(product_id, int) or direction not in CURSOR_DIRECTIONS:
+        raise ValueError("Invalid cursor")
+    return created_at, product_id, direction
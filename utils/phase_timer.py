@@ -0,0 +1,56 @@
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """
+    Accumulates wall time per named phase
+
+    Phases may nest; time spent in an inner phase is not counted again in the
+    outer one, so the phase totals add up to the measured wall time.
+    """
+
+    def __init__(self, seconds: dict = None):
+        """
+        Args:
+            seconds: Totals to continue from (e.g. of an interrupted attempt)
+        """
+        self.seconds = dict(seconds or {})
+        self._nested = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time the enclosed block as phase name
+
+        Args:
+            name: Phase name
+        """
+        started = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            inner = self._nested.pop()
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed - inner
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def add(self, name: str, seconds: float):
+        """
+        Add time measured elsewhere to a phase
+
+        Args:
+            name: Phase name
+            seconds: Seconds to add
+        """
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def total(self) -> float:
+        """Sum of all phases in seconds"""
+        return sum(self.seconds.values())
+
+    def summary(self) -> dict:
+        """Phase totals rounded to milliseconds"""
+        return {name: round(seconds, 3) for name, seconds in self.seconds.items()}
@@ -0,0 +1,173 @@
+from sqlalchemy import Boolean, Float, Integer, String, cast, column, func, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Product
+from utils.validators import (
+    MAX_DESCRIPTION_LENGTH, MAX_NAME_LENGTH, MAX_QUANTITY,
+    validate_price, validate_quantity, validate_sku
+)
+
+# Columns a batch update may change; None leaves a column as it is
+UPDATE_COLUMNS = (
+    ("name", String),
+    ("description", String),
+    ("price", Float),
+    ("quantity", Integer),
+    ("is_active", Boolean),
+)
+
+
+def _field_error(item: dict) -> str:
+    """
+    Check the product fields of a batch item against the column limits
+
+    Args:
+        item: Item fields; None values are skipped
+
+    Returns:
+        str: Reason the item is rejected, or None if it is valid
+    """
+    if item.get("sku") is not None and not validate_sku(item["sku"]):
+        return "Invalid SKU format"
+    if item.get("name") is not None and not (item["name"].strip() and len(item["name"]) <= MAX_NAME_LENGTH):
+        return "Invalid name"
+    if item.get("description") is not None and len(item["description"]) > MAX_DESCRIPTION_LENGTH:
+        return "Description is too long"
+    if item.get("price") is not None and not validate_price(item["price"]):
+        return "Invalid price"
+    if item.get("quantity") is not None and not (validate_quantity(item["quantity"]) and item["quantity"] <= MAX_QUANTITY):
+        return "Invalid quantity"
+    return None
+
+
+async def create_products(db: AsyncSession, items: list) -> tuple[list, list]:
+    """
+    Insert a batch of products with one lookup and one INSERT
+
+    Existing SKUs are resolved in a single case-insensitive query. The valid
+    items are written by one multi-row INSERT ... ON CONFLICT DO NOTHING, so
+    a SKU created concurrently is reported as existing instead of failing the
+    batch. The caller commits.
+
+    Args:
+        db: Async database session
+        items: Product fields per item, as ProductCreate dicts
+
+    Returns:
+        tuple: (result per item in request order, dicts of the created products)
+    """
+    results = [None] * len(items)
+    pending = {}
+
+    existing = set(await db.scalars(
+        select(func.lower(Product.sku)).where(
+            func.lower(Product.sku).in_({item["sku"].lower() for item in items})
+        )
+    ))
+
+    for index, item in enumerate(items):
+        key = item["sku"].lower()
+        error = _field_error(item)
+        if error is None and key in existing:
+            error = "Product with this SKU already exists"
+        if error is None and key in pending:
+            error = "Duplicate SKU in batch"
+        if error is not None:
+            results[index] = {"index": index, "sku": item["sku"], "status": "error", "error": error}
+        else:
+            pending[key] = index
+
+    created = []
+    if pending:
+        rows = [items[index] for index in pending.values()]
+        inserted = await db.scalars(
+            insert(Product).values(rows).on_conflict_do_nothing().returning(Product)
+        )
+        products = {product.sku.lower(): product for product in inserted}
+
+        for key, index in pending.items():
+            product = products.get(key)
+            if product is None:
+                results[index] = {
+                    "index": index, "sku": items[index]["sku"], "status": "error",
+                    "error": "Product with this SKU already exists"
+                }
+                continue
+            product_dict = product.to_dict()
+            created.append(product_dict)
+            results[index] = {"index": index, "sku": product.sku, "status": "created", "product": product_dict}
+
+    return results, created
+
+
+async def update_products(db: AsyncSession, items: list) -> tuple[list, list]:
+    """
+    Apply a batch of partial updates with one lookup and one UPDATE
+
+    The changes are joined to products as a VALUES list in a single
+    UPDATE ... FROM, where a NULL keeps the current value. Rows the update
+    would not change are skipped and reported as unchanged, keeping their
+    updated_at. The caller commits.
+
+    Args:
+        db: Async database session
+        items: Product id and fields to change per item, as dicts
+
+    Returns:
+        tuple: (result per item in request order, dicts of the updated products)
+    """
+    results = [None] * len(items)
+    pending = {}
+
+    found = set(await db.scalars(
+        select(Product.id).where(Product.id.in_({item["id"] for item in items}))
+    ))
+
+    for index, item in enumerate(items):
+        error = _field_error(item)
+        if error is None and item["id"] not in found:
+            error = "Product not found"
+        if error is None and item["id"] in pending:
+            error = "Duplicate id in batch"
+        if error is not None:
+            results[index] = {"index": index, "id": item["id"], "status": "error", "error": error}
+        else:
+            pending[item["id"]] = index
+
+    updated = []
+    if pending:
+        changes = values(
+            column("id", Integer),
+            *(column(name, type_) for name, type_ in UPDATE_COLUMNS),
+            name="changes"
+        ).data([
+            (items[index]["id"],) + tuple(items[index].get(name) for name, _ in UPDATE_COLUMNS)
+            for index in pending.values()
+        ])
+        # Cast, since a VALUES column holding only NULLs is typed as text
+        new_values = {
+            name: func.coalesce(cast(changes.c[name], type_), getattr(Product, name))
+            for name, type_ in UPDATE_COLUMNS
+        }
+        current = tuple_(*(getattr(Product, name) for name in new_values))
+
+        stmt = (
+            update(Product)
+            .where(Product.id == changes.c.id)
+            .where(current.is_distinct_from(tuple_(*new_values.values())))
+            .values(**new_values, updated_at=func.now())
+            .returning(Product)
+            .execution_options(synchronize_session=False)
+        )
+        products = {product.id: product for product in await db.scalars(stmt)}
+
+        for product_id, index in pending.items():
+            product = products.get(product_id)
+            if product is None:
+                results[index] = {"index": index, "id": product_id, "status": "unchanged"}
+                continue
+            product_dict = product.to_dict()
+            updated.append(product_dict)
+            results[index] = {"index": index, "id": product_id, "status": "updated", "product": product_dict}
+
+    return results, updated
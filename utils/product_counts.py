@@ -0,0 +1,116 @@
+import hashlib
+import json
+import redis
+from sqlalchemy import func, select, text
+from utils.progress_tracker import async_redis_client
+from utils.catalog_version import CatalogVersion
+
+# Ways of counting the products that match a listing
+COUNT_STRATEGIES = ("exact", "estimated", "cached")
+
+# Estimates below this are replaced by an exact count, which is cheap there
+EXACT_COUNT_THRESHOLD = 10000
+
+# Cached counts also expire on their own, in case a write missed its bump
+COUNT_CACHE_TTL = 300
+
+
+async def _table_row_estimate(db) -> float:
+    """
+    Estimate the rows of the products table the way the planner does
+
+    reltuples is scaled by the table's current size, so the estimate follows
+    inserts and deletes between ANALYZE runs.
+
+    Returns:
+        float: Estimated rows, or None if the table was never analyzed
+    """
+    return await db.scalar(text("""
+        SELECT CASE WHEN c.reltuples < 0 OR c.relpages = 0 THEN NULL
+                    ELSE c.reltuples / c.relpages
+                         * (pg_relation_size(c.oid) / current_setting('block_size')::int)
+               END
+        FROM pg_class c
+        WHERE c.oid = 'products'::regclass
+    """))
+
+
+async def _planner_row_estimate(db, stmt) -> float:
+    """
+    Get the planner's row estimate for a query without running it
+
+    Args:
+        db: Async database session
+        stmt: SQLAlchemy select statement
+
+    Returns:
+        float: Estimated rows
+    """
+    # Connect first: the dialect learns how to quote literals on first connect
+    connection = await db.connection()
+    compiled = stmt.compile(dialect=connection.dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+async def _cache_key(filters: dict) -> str:
+    """Redis key of the cached count for a set of filters at the current catalog version"""
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    return f"product_count:{await CatalogVersion.get_async()}:{digest}"
+
+
+async def _exact_count(db, stmt) -> int:
+    """COUNT the rows of a select statement"""
+    return await db.scalar(select(func.count()).select_from(stmt.subquery()))
+
+
+async def count_products(db, stmt, strategy: str = "exact", filters: dict = None) -> tuple[int, str]:
+    """
+    Count the products matched by a listing query
+
+    - exact: COUNT over the filtered table
+    - estimated: pg_class statistics without filters, the planner's estimate
+      with filters; small estimates are counted exactly instead
+    - cached: exact count cached in Redis per filter set until the catalog
+      version changes (falls back to exact if Redis is unavailable)
+
+    Args:
+        db: Async database session
+        stmt: Filtered product select statement
+        strategy: One of COUNT_STRATEGIES
+        filters: Filter values of the query, used as the cache key
+
+    Returns:
+        tuple: (total, kind) where kind is "exact", "estimated" or "cached"
+    """
+    if strategy == "estimated":
+        estimate = await _table_row_estimate(db) if not filters else None
+        if estimate is None:
+            estimate = await _planner_row_estimate(db, stmt)
+        if estimate >= EXACT_COUNT_THRESHOLD:
+            return int(round(estimate)), "estimated"
+
+    elif strategy == "cached":
+        try:
+            key = await _cache_key(filters or {})
+            cached = await async_redis_client.get(key)
+        except redis.RedisError as e:
+            print(f"Count cache unavailable: {e}")
+            key, cached = None, None
+        if cached is not None:
+            return int(cached), "cached"
+
+        total = await _exact_count(db, stmt)
+        if key is not None:
+            try:
+                await async_redis_client.setex(key, COUNT_CACHE_TTL, total)
+            except redis.RedisError as e:
+                print(f"Count cache unavailable: {e}")
+        return total, "exact"
+
+    return await _exact_count(db, stmt), "exact"
@@ -0,0 +1,94 @@
+import csv
+import io
+import orjson
+from typing import AsyncIterator, Optional
+from sqlalchemy import select
+from database import AsyncSessionLocal
+from models import Product
+from utils.product_search import search_filter
+
+# Export formats and their media types
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows fetched from the server-side cursor and written per response chunk
+EXPORT_BATCH_ROWS = 2000
+
+# CSV columns, in the order and spelling the importer reads
+CSV_COLUMNS = ("sku", "name", "description", "price", "quantity", "is_active")
+
+# NDJSON fields, matching Product.to_dict
+NDJSON_COLUMNS = Product.API_FIELDS
+
+
+def _csv_bool(value: Optional[bool]) -> str:
+    """Encode a boolean cell; None stays blank, which the importer reads as its default"""
+    if value is None:
+        return ""
+    return "true" if value else "false"
+
+
+async def _csv_chunks(result) -> AsyncIterator[bytes]:
+    """Encode row batches as CSV, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+
+    async for rows in result.partitions():
+        writer.writerows(
+            (sku, name, description or "", repr(price), quantity, _csv_bool(is_active))
+            for sku, name, description, price, quantity, is_active in rows
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header of an empty export
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _ndjson_chunks(result) -> AsyncIterator[bytes]:
+    """Encode row batches as one JSON object per line"""
+    async for rows in result.partitions():
+        yield b"".join(orjson.dumps(dict(zip(NDJSON_COLUMNS, row))) + b"\n" for row in rows)
+
+
+async def export_products(
+    export_format: str,
+    search: Optional[str] = None,
+    is_active: Optional[bool] = None
+) -> AsyncIterator[bytes]:
+    """
+    Stream the catalog as CSV or NDJSON
+
+    Rows are read in id order through a server-side cursor, EXPORT_BATCH_ROWS
+    at a time, so memory use does not grow with the catalog. The export is one
+    SELECT and therefore one consistent snapshot. The generator opens its own
+    session, which stays open until the response has been sent.
+
+    CSV holds the columns of an import file and can be uploaded again as is;
+    NDJSON holds every field, like the product endpoints.
+
+    Args:
+        export_format: "csv" or "ndjson"
+        search: Search term, as for GET /products
+        is_active: Filter by active status
+
+    Returns:
+        Async iterator of encoded response chunks
+    """
+    columns = CSV_COLUMNS if export_format == "csv" else NDJSON_COLUMNS
+    stmt = select(*(getattr(Product, name) for name in columns)).order_by(Product.id)
+    if search:
+        stmt = stmt.where(search_filter(search))
+    if is_active is not None:
+        stmt = stmt.where(Product.is_active == is_active)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        chunks = _csv_chunks(result) if export_format == "csv" else _ndjson_chunks(result)
+        async for chunk in chunks:
+            yield chunk
@@ -0,0 +1,63 @@
+from sqlalchemy import case, func, or_
+from models import Product
+
+# Shorter terms have no trigrams to look up, so they only match SKU prefixes
+MIN_SUBSTRING_LENGTH = 3
+
+
+def _escape_like(term: str) -> str:
+    """Escape LIKE wildcards so the term matches literally"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_filter(term: str):
+    """
+    Build the WHERE clause of a product search
+
+    Terms of MIN_SUBSTRING_LENGTH characters or more match anywhere in SKU,
+    name or description (served by the pg_trgm GIN indexes). Shorter terms
+    match the start of the SKU (served by ix_products_sku_prefix).
+
+    Args:
+        term: Search term
+
+    Returns:
+        SQL expression
+    """
+    escaped = _escape_like(term)
+    if len(term) < MIN_SUBSTRING_LENGTH:
+        return func.lower(Product.sku).like(f"{escaped.lower()}%", escape="\\")
+
+    pattern = f"%{escaped}%"
+    return or_(
+        Product.sku.ilike(pattern, escape="\\"),
+        Product.name.ilike(pattern, escape="\\"),
+        Product.description.ilike(pattern, escape="\\")
+    )
+
+
+def search_ordering(term: str) -> list:
+    """
+    Build the ORDER BY of a product search, most relevant first
+
+    Exact SKU matches come first, then SKU prefix matches, then the rest by
+    trigram similarity of the name; ties keep the newest-first order.
+
+    Args:
+        term: Search term
+
+    Returns:
+        list: ORDER BY expressions
+    """
+    sku = func.lower(Product.sku)
+    rank = case(
+        (sku == term.lower(), 0),
+        (sku.like(f"{_escape_like(term.lower())}%", escape="\\"), 1),
+        else_=2
+    )
+    return [
+        rank,
+        func.similarity(Product.name, term).desc(),
+        Product.created_at.desc(),
+        Product.id.desc()
+    ]
@@ -1,10 +1,14 @@
 import redis
+import redis.asyncio
 from config import settings
 import json
 
 # Redis client for progress tracking
 redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
 
+# Client for code running on the API's event loop (same server)
+async_redis_client = redis.asyncio.from_url(settings.REDIS_URL, decode_responses=True)
+
 
 class ProgressTracker:
     """Utility class for tracking task progress in Redis"""
@@ -32,6 +36,79 @@ class ProgressTracker:
             json.dumps(data)
         )
     
+    @staticmethod
+    def set_byte_progress(
+        task_id: str,
+        bytes_processed: int,
+        total_bytes: int,
+        rows_processed: int,
+        status: str,
+        estimated_total_rows: int = None
+    ):
+        """
+        Set progress for a task measured in bytes consumed from the input file
+
+        The payload keeps "progress"/"total" (in bytes) for existing clients and
+        adds both byte and row figures.
+
+        Args:
+            task_id: Unique task identifier
+            bytes_processed: Bytes of the input consumed so far
+            total_bytes: Size of the input in bytes
+            rows_processed: Data rows processed so far
+            status: Status message
+            estimated_total_rows: Row estimate for the whole file
+        """
+        data = {
+            "progress": bytes_processed,
+            "status": status,
+            "total": total_bytes,
+            "percentage": int((bytes_processed / total_bytes) * 100) if total_bytes > 0 else 0,
+            "bytes_processed": bytes_processed,
+            "total_bytes": total_bytes,
+            "rows_processed": rows_processed,
+            "estimated_total_rows": estimated_total_rows
+        }
+        redis_client.setex(
+            f"progress:{task_id}",
+            3600,
+            json.dumps(data)
+        )
+
+    @staticmethod
+    def increment_byte_progress(
+        task_id: str,
+        bytes_amount: int,
+        rows_amount: int,
+        total_bytes: int,
+        status: str,
+        estimated_total_rows: int = None
+    ) -> tuple[int, int]:
+        """
+        Add to byte/row progress totals shared by several workers of one task
+
+        Args:
+            task_id: Unique task identifier
+            bytes_amount: Bytes to add to the shared counter
+            rows_amount: Rows to add to the shared counter
+            total_bytes: Size of the input in bytes
+            status: Status message
+            estimated_total_rows: Row estimate for the whole file
+
+        Returns:
+            tuple: New shared (bytes_processed, rows_processed)
+        """
+        counter_key = f"progress:{task_id}:count"
+        pipe = redis_client.pipeline()
+        pipe.hincrby(counter_key, "bytes", bytes_amount)
+        pipe.hincrby(counter_key, "rows", rows_amount)
+        pipe.expire(counter_key, 3600)
+        bytes_processed, rows_processed, _ = pipe.execute()
+        ProgressTracker.set_byte_progress(
+            task_id, bytes_processed, total_bytes, rows_processed, status, estimated_total_rows
+        )
+        return bytes_processed, rows_processed
+
     @staticmethod
     def get_progress(task_id: str):
         """
@@ -70,13 +147,14 @@ class ProgressTracker:
         )
     
     @staticmethod
-    def set_complete(task_id: str, message: str = "Complete"):
+    def set_complete(task_id: str, message: str = "Complete", rejected_url: str = None):
         """
         Mark task as complete
         
         Args:
             task_id: Unique task identifier
             message: Completion message
+            rejected_url: Download URL of the rejected-rows file, if any rows were rejected
         """
         data = {
             "progress": 100,
@@ -84,6 +162,8 @@ class ProgressTracker:
             "message": message,
             "percentage": 100
         }
+        if rejected_url:
+            data["rejected_url"] = rejected_url
         redis_client.setex(
             f"progress:{task_id}",
             3600,
@@ -98,4 +178,4 @@ class ProgressTracker:
         Args:
             task_id: Unique task identifier
         """
-        redis_client.delete(f"progress:{task_id}")
+        redis_client.delete(f"progress:{task_id}", f"progress:{task_id}:count")
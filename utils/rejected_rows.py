@@ -0,0 +1,139 @@
+import os
+import re
+import time
+import pandas as pd
+from config import settings
+
+# Leading columns of a rejected-rows sidecar; the original columns follow
+SIDECAR_COLUMNS = ["line_number", "reason"]
+
+# Sidecars and per-shard parts in the upload directory
+SIDECAR_NAME = re.compile(r"\.rejected(\.\d+)?\.csv$")
+
+
+def rejected_rows_path(task_id: str, shard: int = None) -> str:
+    """
+    Get the path of the rejected-rows sidecar of an import
+
+    Args:
+        task_id: Unique task identifier
+        shard: Shard index for the per-shard part of a sharded import
+
+    Returns:
+        str: Path inside the upload directory
+    """
+    suffix = f".rejected.{shard}.csv" if shard is not None else ".rejected.csv"
+    return os.path.join(settings.UPLOAD_DIR, f"{task_id}{suffix}")
+
+
+def append_rejected_rows(path: str, rejected: pd.DataFrame, line_offset: int = 1) -> int:
+    """
+    Append rejected rows from validate_chunk to a sidecar CSV
+
+    Each row is written with its original line number and the rejection
+    reason, followed by the original cells. Line numbers count records with
+    the header as line 1, the way spreadsheets number rows. A corrected sidecar
+    can be uploaded as is; validate_chunk then keeps its line numbers.
+
+    Args:
+        path: Sidecar path
+        rejected: Rejected frame with row_num and reason columns
+        line_offset: Added to row_num to get the line number
+
+    Returns:
+        int: Size of the sidecar in bytes after writing
+    """
+    if not rejected.empty:
+        original = rejected.drop(columns=[c for c in SIDECAR_COLUMNS + ["row_num"] if c in rejected.columns])
+        sidecar = pd.concat(
+            [
+                pd.DataFrame({
+                    "line_number": rejected["row_num"] + line_offset,
+                    "reason": rejected["reason"]
+                }),
+                original
+            ],
+            axis=1
+        )
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        sidecar.to_csv(path, mode="a", header=write_header, index=False)
+
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def truncate_rejected_rows(path: str, size: int):
+    """
+    Cut a sidecar back to the size recorded by a checkpoint
+
+    Rows written after the checkpoint are written again by the resumed import.
+
+    Args:
+        path: Sidecar path
+        size: Size in bytes to keep; 0 removes the file
+    """
+    if not os.path.exists(path):
+        return
+    if size:
+        with open(path, "r+b") as f:
+            f.truncate(size)
+    else:
+        os.remove(path)
+
+
+def merge_rejected_parts(path: str, parts: list) -> int:
+    """
+    Concatenate per-shard sidecars into one, shifting their line numbers
+
+    Args:
+        path: Path of the merged sidecar
+        parts: (part_path, line_offset) tuples in file order; shard-relative
+            line numbers are shifted by line_offset
+
+    Returns:
+        int: Number of rejected rows in the merged sidecar
+    """
+    total = 0
+    truncate_rejected_rows(path, 0)
+
+    for part_path, line_offset in parts:
+        if not os.path.exists(part_path):
+            continue
+        part = pd.read_csv(part_path, dtype=str, keep_default_na=False)
+        part["line_number"] = pd.to_numeric(part["line_number"]) + line_offset
+        part.to_csv(path, mode="a", header=total == 0, index=False)
+        total += len(part)
+        os.remove(part_path)
+
+    return total
+
+
+def remove_expired_rejected_rows(max_age_days: float = None) -> int:
+    """
+    Delete rejected-rows sidecars older than REJECTED_ROWS_TTL_DAYS
+
+    Called whenever an import finishes, so the upload directory does not keep
+    a sidecar for every import that ever rejected rows. Per-shard parts left
+    by an interrupted import are removed the same way.
+
+    Args:
+        max_age_days: Age limit; defaults to settings.REJECTED_ROWS_TTL_DAYS
+
+    Returns:
+        int: Number of files removed
+    """
+    if max_age_days is None:
+        max_age_days = settings.REJECTED_ROWS_TTL_DAYS
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+
+    for entry in os.scandir(settings.UPLOAD_DIR):
+        if not SIDECAR_NAME.search(entry.name):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError as e:
+            print(f"Could not remove rejected rows {entry.name}: {e}")
+
+    return removed
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import redis
+from typing import Optional
+from fastapi.responses import ORJSONResponse, Response
+from config import settings
+from utils.progress_tracker import async_redis_client
+from utils.catalog_version import CatalogVersion
+
+
+class ResponseCache:
+    """
+    Utility class for caching JSON API responses in Redis
+
+    Used by async request handlers, so it talks to Redis through the asyncio
+    client and never blocks the event loop.
+
+    Keys include the catalog version, so every product write or import chunk
+    invalidates all cached responses at once, for every API worker. Entries
+    are written with an explicit PRODUCT_CACHE_TTL, so entries left behind by
+    older catalog versions go away on their own. Redis errors count as cache
+    misses.
+    """
+
+    @staticmethod
+    async def version() -> Optional[str]:
+        """
+        Get the current catalog version for building cache keys and ETags
+
+        Read it before querying the database: writes bump the version after
+        committing, so a result read afterwards is at least as new as the
+        version.
+
+        Returns:
+            str: Catalog version, or None if Redis is unavailable
+        """
+        try:
+            return await CatalogVersion.get_async()
+        except redis.RedisError as e:
+            print(f"Response cache unavailable: {e}")
+            return None
+
+    @staticmethod
+    def key(namespace: str, params: dict, version: Optional[str]) -> Optional[str]:
+        """
+        Build the cache key of a request
+
+        Args:
+            namespace: Kind of response, e.g. "products" or "product"
+            params: Normalized request parameters
+            version: Catalog version from ResponseCache.version
+
+        Returns:
+            str: Cache key, or None if Redis is unavailable
+        """
+        if version is None:
+            return None
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        return f"cache:{namespace}:{version}:{digest}"
+
+    @staticmethod
+    async def get(key: Optional[str]) -> Optional[Response]:
+        """
+        Get a cached response
+
+        Args:
+            key: Key from ResponseCache.key
+
+        Returns:
+            Response: Cached JSON response, or None on a miss
+        """
+        if key is None:
+            return None
+        try:
+            body = await async_redis_client.get(key)
+        except redis.RedisError as e:
+            print(f"Response cache unavailable: {e}")
+            return None
+        if body is None:
+            return None
+        # Stored as "<etag>\n<json body>"; JSON bodies have no raw newlines
+        etag, body = body.split("\n", 1)
+        headers = {"X-Cache": "HIT"}
+        if etag:
+            headers["ETag"] = etag
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    async def store(key: Optional[str], content, etag: Optional[str] = None) -> ORJSONResponse:
+        """
+        Serialize a response with orjson and cache it
+
+        Args:
+            key: Key from ResponseCache.key
+            content: Response content; datetimes are serialized like isoformat()
+            etag: ETag sent with the response, cached along with it
+
+        Returns:
+            ORJSONResponse: The response to send
+        """
+        response = ORJSONResponse(content=content, headers={"X-Cache": "MISS"})
+        if etag:
+            response.headers["ETag"] = etag
+        if key is not None:
+            try:
+                await async_redis_client.setex(key, settings.PRODUCT_CACHE_TTL, f"{etag or ''}\n{response.body.decode()}")
+            except redis.RedisError as e:
+                print(f"Response cache unavailable: {e}")
+        return response
@@ -0,0 +1,142 @@
+import sys
+import numpy as np
+import pandas as pd
+
+# Hashes buffered before they are sorted into a segment
+SEGMENT_ROWS = 65536
+
+# A segment is merged into the one before it once that one is less than this
+# many times bigger, so segment sizes grow geometrically
+MERGE_RATIO = 2
+
+
+def hash_skus(skus: pd.Series) -> np.ndarray:
+    """
+    Hash SKUs case-insensitively to 64-bit integers
+
+    Args:
+        skus: Series of SKU strings
+
+    Returns:
+        np.ndarray: uint64 hash per SKU
+    """
+    return pd.util.hash_pandas_object(skus.str.lower(), index=False).to_numpy()
+
+
+class SeenSkuSet:
+    """
+    Compact set of SKU hashes seen so far in an import
+
+    Hashes live in a few sorted numpy segments at 8 bytes each, like a small
+    LSM tree: new hashes are buffered in a set, sorted into a segment when the
+    buffer fills up, and merged only with segments of similar size. Each hash
+    is merged about log2(n / SEGMENT_ROWS) times and there are about as many
+    segments. Lookups probe the buffer and binary search each segment, so
+    millions of SKUs stay cheap to check.
+    A 64-bit hash collision can make a new SKU count as seen; for ten million
+    SKUs the chance of any collision is about one in 370,000.
+    """
+
+    def __init__(self):
+        self._segments = []
+        self._buffer = set()
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self._segments) + len(self._buffer)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the stored hashes (buffered ones are Python ints in a set)"""
+        segment_bytes = sum(segment.nbytes for segment in self._segments)
+        return segment_bytes + sys.getsizeof(self._buffer) + 32 * len(self._buffer)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Check which hashes are in the set
+
+        Args:
+            hashes: uint64 hashes
+
+        Returns:
+            np.ndarray: Boolean mask, True where the hash was seen before
+        """
+        # Sorted lookups walk each segment front to back, which is far more
+        # cache friendly than random probes into a large segment
+        order = np.argsort(hashes)
+        queries = hashes[order]
+        found = np.zeros(len(hashes), dtype=bool)
+        for segment in self._segments:
+            positions = np.searchsorted(segment, queries)
+            in_range = positions < len(segment)
+            in_range[in_range] = segment[positions[in_range]] == queries[in_range]
+            found |= in_range
+        if self._buffer:
+            found |= np.fromiter((query in self._buffer for query in queries.tolist()), bool, len(queries))
+        seen = np.empty(len(hashes), dtype=bool)
+        seen[order] = found
+        return seen
+
+    def add(self, hashes: np.ndarray):
+        """
+        Add hashes to the set (callers add only hashes not yet contained)
+
+        Args:
+            hashes: uint64 hashes
+        """
+        self._buffer.update(hashes.tolist())
+        if len(self._buffer) >= SEGMENT_ROWS:
+            self._flush()
+
+    def _flush(self):
+        """Sort buffered hashes into a segment and merge it with segments of similar size"""
+        segment = np.fromiter(self._buffer, np.uint64, len(self._buffer))
+        segment.sort()
+        self._buffer = set()
+        while self._segments and len(self._segments[-1]) < MERGE_RATIO * len(segment):
+            # Both are sorted, so the stable sort merges two runs in linear time
+            segment = np.sort(np.concatenate((self._segments.pop(), segment)), kind="stable")
+        self._segments.append(segment)
+
+
+class SkuDeduplicator:
+    """
+    Last-wins SKU de-duplication for an import, within and across chunks
+
+    Within a chunk only the last row of each case-insensitive SKU is kept, so
+    no chunk writes the same SKU twice; this comparison is exact. A SKU that
+    repeats a row from an earlier chunk is still written: chunks are applied
+    in file order, so the later row wins. Repeats across chunks are found
+    through SeenSkuSet hashes and only counted. Both cases are counted as
+    duplicates.
+    """
+
+    def __init__(self):
+        self.seen = SeenSkuSet()
+        self.duplicates = 0
+
+    def dedupe(self, rows: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+        """
+        Drop in-chunk duplicates and count repeats of earlier chunks
+
+        Args:
+            rows: Clean frame produced by validate_chunk
+
+        Returns:
+            tuple: (rows without in-chunk duplicates, duplicates found in this chunk)
+        """
+        if rows.empty:
+            return rows, 0
+
+        # Exact within the chunk, so a hash collision cannot drop a distinct SKU
+        repeated = rows["sku"].str.lower().duplicated(keep="last").to_numpy()
+        if repeated.any():
+            rows = rows[~repeated]
+
+        hashes = hash_skus(rows["sku"])
+
+        seen = self.seen.contains(hashes)
+        self.seen.add(hashes[~seen])
+
+        duplicates = int(repeated.sum() + seen.sum())
+        self.duplicates += duplicates
+        return rows, duplicates
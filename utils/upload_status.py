@@ -0,0 +1,68 @@
+import json
+from utils.progress_tracker import redis_client
+
+
+class UploadStatus:
+    """Utility class for sharing the state of a streaming upload with its import task"""
+
+    @staticmethod
+    def _save(task_id: str, data: dict):
+        redis_client.setex(f"upload:{task_id}", 3600, json.dumps(data))
+
+    @staticmethod
+    def update(task_id: str, bytes_received: int, expected_bytes: int = 0):
+        """
+        Record that more of the upload has been written to disk
+
+        Args:
+            task_id: Unique task identifier
+            bytes_received: Bytes written and flushed so far
+            expected_bytes: Announced upload size (Content-Length), 0 if unknown
+        """
+        UploadStatus._save(task_id, {
+            "state": "receiving",
+            "bytes_received": bytes_received,
+            "expected_bytes": expected_bytes
+        })
+
+    @staticmethod
+    def complete(task_id: str, file_size: int):
+        """
+        Mark the upload as fully written
+
+        Args:
+            task_id: Unique task identifier
+            file_size: Final size of the file in bytes
+        """
+        UploadStatus._save(task_id, {
+            "state": "complete",
+            "bytes_received": file_size,
+            "expected_bytes": file_size
+        })
+
+    @staticmethod
+    def fail(task_id: str, error_message: str):
+        """
+        Mark the upload as aborted so the import task stops following it
+
+        Args:
+            task_id: Unique task identifier
+            error_message: Why the upload stopped
+        """
+        UploadStatus._save(task_id, {"state": "failed", "error": error_message})
+
+    @staticmethod
+    def get(task_id: str):
+        """
+        Get the state of an upload
+
+        Args:
+            task_id: Unique task identifier
+
+        Returns:
+            dict: Upload state or None if not found
+        """
+        data = redis_client.get(f"upload:{task_id}")
+        if data:
+            return json.loads(data)
+        return None
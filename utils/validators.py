@@ -1,6 +1,22 @@
 import re
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
 from typing import Optional
 
+# SKU should contain only alphanumeric, hyphens, and underscores
+SKU_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+# Accepted spellings for boolean CSV values (compared lowercase)
+TRUE_VALUES = {"true", "t", "yes", "y", "1", "on"}
+FALSE_VALUES = {"false", "f", "no", "n", "0", "off"}
+
+# Column limits of the products table
+MAX_SKU_LENGTH = 100
+MAX_NAME_LENGTH = 255
+MAX_DESCRIPTION_LENGTH = 1000
+MAX_QUANTITY = 2**31 - 1
+
 
 def validate_sku(sku: str) -> bool:
     """
@@ -12,10 +28,9 @@ def validate_sku(sku: str) -> bool:
     Returns:
         bool: True if valid, False otherwise
     """
-    if not sku or len(sku) > 100:
+    if not sku or len(sku) > MAX_SKU_LENGTH:
         return False
-    # SKU should contain only alphanumeric, hyphens, and underscores
-    return bool(re.match(r'^[A-Za-z0-9_-]+$', sku))
+    return bool(SKU_PATTERN.match(sku))
 
 
 def validate_price(price: float) -> bool:
@@ -93,3 +108,118 @@ def validate_csv_headers(headers: list) -> tuple[bool, Optional[str]]:
         return False, f"Missing required headers: {', '.join(missing)}"
     
     return True, None
+
+
+def parse_bool_series(values: pd.Series, default: bool = True) -> pd.Series:
+    """
+    Parse CSV boolean strings ("true", "no", "1", ...) in a vectorized way
+
+    Args:
+        values: Series of raw strings
+        default: Value used for blank cells
+
+    Returns:
+        pd.Series: Nullable boolean series, NA where the value is not recognized
+    """
+    normalized = values.fillna("").astype(str).str.strip().str.lower()
+    parsed = pd.Series(pd.NA, index=values.index, dtype="boolean")
+    parsed[normalized.isin(TRUE_VALUES)] = True
+    parsed[normalized.isin(FALSE_VALUES)] = False
+    parsed[normalized == ""] = default
+    return parsed
+
+
+def validate_chunk(chunk: pd.DataFrame, first_row_num: int = 1) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Validate and normalize a chunk of product rows with vectorized pandas ops
+
+    Expects lowercase column names and raw string cells (read_csv with dtype=str).
+    Numeric and boolean columns from columnar files are used as they are,
+    without string parsing. Optional columns default to description "",
+    quantity 0 and is_active True.
+
+    A line_number column, as written to rejected-rows sidecars, supplies the
+    row numbers instead of first_row_num, so a corrected sidecar keeps the
+    line numbers of the original file.
+
+    Args:
+        chunk: DataFrame with at least sku, name and price columns
+        first_row_num: Data row number (1-indexed, header excluded) of the first row
+
+    Returns:
+        tuple: (clean_df, rejected_df)
+            clean_df has row_num, sku, name, description, price, quantity, is_active
+            rejected_df has the original columns plus row_num and reason
+    """
+    index = chunk.index
+    row_num = pd.Series(np.arange(first_row_num, first_row_num + len(chunk)), index=index)
+    if "line_number" in chunk.columns:
+        # Sidecar line numbers count the header as line 1
+        line_number = pd.to_numeric(chunk["line_number"], errors="coerce")
+        row_num = (line_number - 1).fillna(row_num).astype("int64")
+
+    def text_column(name: str) -> pd.Series:
+        if name not in chunk.columns:
+            return pd.Series("", index=index, dtype=object)
+        return chunk[name].fillna("").astype(str).str.strip()
+
+    sku = text_column("sku")
+    name = text_column("name")
+    description = text_column("description")
+
+    def is_numeric_column(name: str) -> bool:
+        return name in chunk.columns and is_numeric_dtype(chunk[name]) and not is_bool_dtype(chunk[name])
+
+    if is_numeric_column("price"):
+        price = chunk["price"].astype("float64")
+    else:
+        price = pd.to_numeric(text_column("price"), errors="coerce")
+
+    if is_numeric_column("quantity"):
+        quantity = chunk["quantity"].astype("float64").fillna(0)
+    else:
+        quantity_raw = text_column("quantity")
+        quantity = pd.to_numeric(quantity_raw.where(quantity_raw != "", "0"), errors="coerce")
+
+    if "is_active" in chunk.columns and is_bool_dtype(chunk["is_active"]):
+        is_active = chunk["is_active"].astype("boolean").fillna(True)
+    elif "is_active" in chunk.columns:
+        is_active = parse_bool_series(chunk["is_active"])
+    else:
+        is_active = pd.Series(True, index=index, dtype="boolean")
+
+    # Ordered checks: the first failing one becomes the row's reason
+    checks = [
+        (~sku.str.match(SKU_PATTERN) | (sku.str.len() > MAX_SKU_LENGTH), "invalid sku"),
+        (name == "", "missing name"),
+        (name.str.len() > MAX_NAME_LENGTH, f"name longer than {MAX_NAME_LENGTH} characters"),
+        (description.str.len() > MAX_DESCRIPTION_LENGTH, f"description longer than {MAX_DESCRIPTION_LENGTH} characters"),
+        (~np.isfinite(price) | (price < 0), "invalid price"),
+        (
+            quantity.isna() | (quantity < 0) | (quantity > MAX_QUANTITY) | (quantity % 1 != 0),
+            "invalid quantity"
+        ),
+        (is_active.isna(), "invalid is_active"),
+    ]
+    conditions = [condition.fillna(True).to_numpy(dtype=bool) for condition, _ in checks]
+    reason = pd.Series(
+        np.select(conditions, [r for _, r in checks], default=""),
+        index=index
+    )
+    valid = reason == ""
+
+    clean = pd.DataFrame({
+        "row_num": row_num[valid],
+        "sku": sku[valid],
+        "name": name[valid],
+        "description": description[valid],
+        "price": price[valid].astype("float64"),
+        "quantity": quantity[valid].astype("int64"),
+        "is_active": is_active[valid].astype(bool),
+    })
+
+    rejected = chunk[~valid].copy()
+    rejected["row_num"] = row_num[~valid]
+    rejected["reason"] = reason[~valid]
+
+    return clean, rejected